@@ -1,15 +1,17 @@
 """
 Placeholder for when we include compound functionality combining other commands. Right now we only have the consistency_check and lockfile creation.
 """
-import json
+import hashlib
+import os
 from pathlib import Path
 import shutil
 import sys
+import tempfile
 import time
 
 # from conda.cli.main_info import get_info_dict
 
-from .utils import logger
+from .utils import logger, json_dump, json_load
 from .commands_proj import proj_check
 from .commands_reqs import reqs_check
 from .commands_lockfile import lockfile_check, lockfile_reqs_check, lock_package_consistency_check
@@ -24,7 +26,7 @@ from .commands_env import (
     env_regenerate,
     pip_step_env_lock,
 )
-from .env_handler import get_prefix, get_conda_info, CondaOpsManagedCondarc, EnvObject, check_env_active, check_env_exists
+from .env_handler import get_prefix, get_conda_info, get_existing_envs, CondaOpsManagedCondarc, EnvObject, check_env_active
 from .conda_config import check_condarc_matches_opinions, check_config_items_match
 from .python_api import run_command
 from .requirements import load_url_lookup
@@ -37,18 +39,30 @@ from .split_requirements import create_split_files
 ##################################################################
 
 
-def lockfile_generate(config, regenerate=True, platform=None):
+def lockfile_generate(config, regenerate=True, platform=None, use_cache=False):
     """
     Generate a lock file from the requirements file.
 
     Args:
         config (dict): Configuration dictionary.
         regenerate (bool, optional): Whether to regenerate the lock file. Defaults to True.
+        use_cache (bool, optional): Whether to reuse a previously generated lock for identical requirements. Defaults to False.
 
     Currently always overwrites the existing lock file when complete.
 
     If regenenerate=True, use a clean environment to generate the lock file. If False, use
     the conda-ops managed environment.
+
+    Locks solved from scratch (regenerate=True) are cached in the ops directory under a hash of the
+    requirements file, the managed condarc and the platform; only the cache for the current inputs is kept.
+    If use_cache=True and regenerate=True and there is a cached lock for the current inputs, it is used in
+    place of solving the environment again. Locks solved in the managed environment (regenerate=False) depend
+    on its contents, so they are neither cached nor taken from the cache.
+
+    Note that a cached lock is not refreshed when newer package versions are published upstream; it is reused
+    for as long as the inputs are unchanged. Use use_cache=False (e.g. `conda ops sync --force`) to solve again.
+
+    Returns the list of lock entries written to the lock file.
     """
     ops_dir = config["paths"]["ops_dir"]
     requirements_file = config["paths"]["requirements"]
@@ -57,19 +71,14 @@ def lockfile_generate(config, regenerate=True, platform=None):
 
     env_prefix = env.prefix
 
-    if regenerate:
-        # create a blank environment name to create the lockfile from scratch
-        logger.info("Generating temporary environment for building lock file from requirements.")
-        raw_test_env_prefix = str(env.prefix) + "-lockfile-generate"
-        for i in range(100):
-            test_env = raw_test_env_prefix + f"-{i}"
-            if not check_env_exists(prefix=test_env):
-                break
-        logger.debug(f"Using temporary environment: {test_env}")
-    else:
-        test_env = env.prefix
+    # this is a platform specific lock file
+    info_dict = get_conda_info()
+    platform = info_dict["platform"]
 
-    if not requirements_file.exists():
+    # hashing the requirements is the first read of the file, so it doubles as the existence check
+    try:
+        inputs_hash = lockfile_inputs_hash(config, platform)
+    except FileNotFoundError:
         logger.error(f"Requirements file does not exist: {requirements_file}")
         logger.info("To create a minimal default requirements file:")
         logger.info(">>> conda ops reqs create")
@@ -78,76 +87,83 @@ def lockfile_generate(config, regenerate=True, platform=None):
         logger.error("Requirements file is not in the correct format. Update it and try again.")
         sys.exit(1)
 
-    create_split_files(requirements_file, ops_dir)
+    cache_dir = ops_dir / ".ops.cache"
+    cached_lockfile = cache_dir / inputs_hash / "lockfile.json"
+    if use_cache and regenerate and cached_lockfile.exists():
+        logger.info("Requirements are unchanged since a previous lock. Using the cached lock.")
+        with open(cached_lockfile, "rb") as jsonfile:
+            new_json_reqs = json_load(jsonfile)
+        write_lockfile(lock_file, new_json_reqs, platform)
+        print(f"Lockfile {lock_file} generated.")
+        return new_json_reqs
 
-    with open(ops_dir / ".ops.channel-order.include", "r", encoding="utf-8") as order_file:
-        order_list = order_file.read().split()
+    if regenerate:
+        # create a blank environment name to create the lockfile from scratch
+        logger.info("Generating temporary environment for building lock file from requirements.")
+        raw_test_env_prefix = str(env.prefix) + "-lockfile-generate"
+        existing_envs = get_existing_envs()
+        for i in range(100):
+            test_env = raw_test_env_prefix + f"-{i}"
+            if Path(test_env) not in existing_envs:
+                break
+        logger.debug(f"Using temporary environment: {test_env}")
+    else:
+        test_env = env.prefix
 
-    pip_channels = ["pypi", "sdist"]
-    json_reqs = None
-    extra_pip_dict = None
-    for i, channel in enumerate(order_list):
-        logger.debug(f"Installing from channel {channel}")
+    # all intermediate files go in a scratch directory that is removed in one go when we are done
+    scratch_dir = Path(tempfile.mkdtemp(dir=ops_dir, prefix=".ops-scratch-"))
+    try:
+        order_list = create_split_files(requirements_file, scratch_dir)
 
-        if channel not in pip_channels:
-            try:
-                json_reqs = conda_step_env_lock(channel, config, prefix=test_env)
-            except Exception as exception:
-                print(exception)
-                json_reqs = None
-        else:
-            try:
-                json_reqs, extra_pip_dict = pip_step_env_lock(channel, config, prefix=test_env, extra_pip_dict=extra_pip_dict)
-            except Exception as exception:
-                print(exception)
-                json_reqs = None
-        if json_reqs is None:
-            if i > 0:
-                logger.warning(f"Last successful channel was {order_list[i-1]}")
-                logger.error("Unimplemented: Decide what to do when not rolling back the environment here")
-                last_good_channel = order_list[i - 1]
-                sys.exit(1)
+        pip_channels = ["pypi", "sdist"]
+        json_reqs = None
+        extra_pip_dict = None
+        for i, channel in enumerate(order_list):
+            logger.debug(f"Installing from channel {channel}")
+
+            if channel not in pip_channels:
+                try:
+                    json_reqs = conda_step_env_lock(channel, config, prefix=test_env, work_dir=scratch_dir)
+                except Exception as exception:
+                    print(exception)
+                    json_reqs = None
             else:
-                logger.error("No successful channels were installed")
-                sys.exit(1)
-            break
-        last_good_channel = order_list[i]
-
-    last_good_lockfile = f".ops.lock.{last_good_channel}"
-    logger.debug(f"Updating lock file from {last_good_lockfile}")
-
-    with open(ops_dir / last_good_lockfile, "r", encoding="utf-8") as jsonfile:
-        new_json_reqs = json.load(jsonfile)
-
-    # this is a platform specific lock file
-    info_dict = get_conda_info()
-    platform = info_dict["platform"]
+                try:
+                    json_reqs, extra_pip_dict = pip_step_env_lock(channel, config, prefix=test_env, extra_pip_dict=extra_pip_dict, work_dir=scratch_dir)
+                except Exception as exception:
+                    print(exception)
+                    json_reqs = None
+            if json_reqs is None:
+                if i > 0:
+                    logger.warning(f"Last successful channel was {order_list[i-1]}")
+                    logger.error("Unimplemented: Decide what to do when not rolling back the environment here")
+                    last_good_channel = order_list[i - 1]
+                    sys.exit(1)
+                else:
+                    logger.error("No successful channels were installed")
+                    sys.exit(1)
+                break
+            last_good_channel = order_list[i]
 
-    # retain lock information from different platforms
-    if lock_file.exists():
-        with open(lock_file, "r", encoding="utf-8") as jsonfile:
-            other_reqs = json.load(jsonfile)
-        for req in other_reqs:
-            if req.get("platform", None) != platform:
-                new_json_reqs.append(req)
+        last_good_lockfile = f".ops.lock.{last_good_channel}"
+        logger.debug(f"Updating lock file from {last_good_lockfile}")
 
-    blob = json.dumps(new_json_reqs, indent=2, sort_keys=True)
-    with open(lock_file, "w", encoding="utf-8") as jsonfile:
-        jsonfile.write(blob)
+        if regenerate:
+            cached_lockfile.parent.mkdir(parents=True, exist_ok=True)
+            move_file(scratch_dir / last_good_lockfile, cached_lockfile)
+            prune_lockfile_cache(cache_dir, keep=inputs_hash)
 
-    # clean up
-    for channel in order_list:
-        if channel in pip_channels:
-            Path(ops_dir / f".ops.{channel}-requirements.txt").unlink()
-        else:
-            Path(ops_dir / f".ops.{channel}-environment.txt").unlink()
-        Path(ops_dir / f".ops.lock.{channel}").unlink()
+        # json_reqs already holds the contents of the last good lock file, so there's no need to read it back
+        new_json_reqs = json_reqs
+        write_lockfile(lock_file, new_json_reqs, platform)
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
 
-    Path(ops_dir / ".ops.channel-order.include").unlink()
     if regenerate:
         env_delete(prefix=test_env)
         logger.debug("Deleted intermediate environment")
     print(f"Lockfile {lock_file} generated.")
+    return new_json_reqs
 
 
 def populate_local_url_lookup(config, die_on_error=True, platform=None, output_instructions=False):
@@ -164,9 +180,9 @@ def populate_local_url_lookup(config, die_on_error=True, platform=None, output_i
         platform = info_dict["platform"]
 
     if lock_file.exists():
-        with open(lock_file, "r", encoding="utf-8") as lockfile:
+        with open(lock_file, "rb") as lockfile:
             try:
-                json_reqs = json.load(lockfile)
+                json_reqs = json_load(lockfile)
             except Exception as exception:
                 logger.warning(f"Unable to load lockfile {lock_file}")
                 logger.debug(exception)
@@ -197,11 +213,13 @@ def populate_local_url_lookup(config, die_on_error=True, platform=None, output_i
     # create a blank environment name to create the lockfile from scratch
     logger.info("Generating temporary environment for resolving the local url lookups from pip-based requirements.")
     raw_test_env = env_name + "-lockfile-generate"
+    raw_test_env_prefix = get_prefix(raw_test_env)
+    existing_envs = get_existing_envs()
     for i in range(100):
         test_env = raw_test_env + f"-{i}"
-        if not check_env_exists(test_env):
+        if Path(raw_test_env_prefix + f"-{i}") not in existing_envs:
             break
-    logger.debug(f"Using temporary environment: {raw_test_env}")
+    logger.debug(f"Using temporary environment: {test_env}")
 
     # check if the environment exists. If not, create it and include pip.
     # XXX may need to use the same version of python as the environment. Maybe not.
@@ -231,10 +249,7 @@ def populate_local_url_lookup(config, die_on_error=True, platform=None, output_i
         else:
             return False
 
-    create_split_files(requirements_file, ops_dir)
-
-    with open(ops_dir / ".ops.channel-order.include", "r", encoding="utf-8") as order_file:
-        order_list = order_file.read().split()
+    order_list = create_split_files(requirements_file, ops_dir)
 
     json_reqs = None
     channel = "sdist"
@@ -262,10 +277,14 @@ def populate_local_url_lookup(config, die_on_error=True, platform=None, output_i
             print(e)
             # if it's missing add it now
 
-    # clean up
-    Path(ops_dir / f".ops.{channel}-requirements.txt").unlink()
-    Path(ops_dir / f".ops.lock.{channel}").unlink()
-    Path(ops_dir / ".ops.channel-order.include").unlink()
+    # clean up all of the split files, not only the ones used here, with a single directory scan
+    pip_channels = ["pypi", "sdist"]
+    cleanup_files = {f".ops.{split_channel}-requirements.txt" if split_channel in pip_channels else f".ops.{split_channel}-environment.txt" for split_channel in order_list}
+    cleanup_files.add(f".ops.lock.{channel}")
+    with os.scandir(ops_dir) as entries:
+        for entry in entries:
+            if entry.name in cleanup_files:
+                os.unlink(entry.path)
 
     env_delete(env_name=test_env)
     logger.debug("Deleted intermediate environment")
@@ -301,7 +320,7 @@ def sync(config, regenerate_lockfile=True, force=False):
         # cannot determine consistency if lockfile
         lockfile_reqs_consistent = False
     if not (lockfile_consistent and lockfile_reqs_consistent) or force:
-        lockfile_generate(config, regenerate=regenerate_lockfile)
+        lockfile_generate(config, regenerate=regenerate_lockfile, use_cache=not force)
         lockfile_consistent, consistency_dict = lockfile_check(config, die_on_error=False, output_instructions=False)
 
     if env.exists():
@@ -346,6 +365,61 @@ def sync(config, regenerate_lockfile=True, force=False):
 #
 ###########################################
 #
+def lockfile_inputs_hash(config, platform):
+    """
+    Return a hash of everything that determines the lock generated by lockfile_generate:
+    the requirements file, the managed condarc and the platform.
+    """
+    inputs_hash = hashlib.blake2b(digest_size=8)
+    inputs_hash.update(config["paths"]["requirements"].read_bytes())
+    condarc = config["paths"]["condarc"]
+    if condarc.exists():
+        inputs_hash.update(condarc.read_bytes())
+    inputs_hash.update(platform.encode())
+    return inputs_hash.hexdigest()
+
+
+def prune_lockfile_cache(cache_dir, keep):
+    """
+    Remove the cached locks in cache_dir for every inputs hash except keep.
+    """
+    for cached_dir in cache_dir.iterdir():
+        if cached_dir.name != keep:
+            shutil.rmtree(cached_dir, ignore_errors=True)
+
+
+def write_lockfile(lock_file, new_json_reqs, platform):
+    """
+    Write the lock entries for platform to the lock file, retaining the lock information from other platforms.
+    """
+    # retain lock information from different platforms
+    if lock_file.exists():
+        with open(lock_file, "rb") as jsonfile:
+            other_reqs = json_load(jsonfile)
+        for req in other_reqs:
+            if req.get("platform", None) != platform:
+                new_json_reqs.append(req)
+
+    # write alongside the lock file and move it into place so the lock file is never left half written
+    temp_lock_file = lock_file.with_name(f".ops.{lock_file.name}.tmp")
+    with open(temp_lock_file, "wb") as jsonfile:
+        json_dump(new_json_reqs, jsonfile)
+    move_file(temp_lock_file, lock_file)
+
+
+def move_file(src, dst):
+    """
+    Move src to dst, replacing dst if it exists.
+
+    This is a single rename when both are on the same filesystem, falling back to a copy otherwise.
+    """
+    try:
+        os.replace(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+        Path(src).unlink()
+
+
 def consistency_check(config=None, die_on_error=False, output_instructions=False):
     """
     Check the consistency of the requirements file vs. lock file vs. conda environment
@@ -1,17 +1,22 @@
-import json
+from contextlib import contextmanager
+import logging
 from pathlib import Path
+import re
 import subprocess
 import sys
-from io import StringIO
-from contextlib import redirect_stdout
 
 from .python_api import run_command
 from .commands_proj import proj_load
-from .env_handler import get_conda_info, CondaOpsManagedCondarc, get_prefix, EnvObject
+from .env_handler import get_conda_info, clear_conda_info_cache, get_existing_envs, CondaOpsManagedCondarc, get_prefix, EnvObject
 from .conda_config import env_pip_interop
 from .commands_lockfile import lockfile_check
-from .requirements import LockSpec, PackageSpec
-from .utils import logger, align_and_print_data
+from .requirements import LockSpec, PackageSpec, load_url_lookup
+from .utils import logger, align_and_print_data, json_dump, json_load, json_loads
+
+# the package lines (those starting with an https url) in the output of `conda list --explicit`
+EXPLICIT_URL_LINE = re.compile(r"^https.*$", re.MULTILINE)
+# the package file extension at the end of a conda package url
+PACKAGE_EXTENSION = re.compile(r"\.(conda|tar\.bz2)$")
 
 ##################################################################
 #
@@ -73,13 +78,16 @@ def env_create(config=None, env_name=None, lock_file=None):
         sys.exit(1)
     explicit_files = generate_explicit_lock_files(config, lock_file=lock_file)
 
+    # each config["paths"] lookup re-reads the config file, so look these up once
+    explicit_lock_file = config["paths"]["explicit_lockfile"]
+    condarc = config["paths"]["condarc"]
     for explicit_file in explicit_files:
-        explicit_lock_file = config["paths"]["explicit_lockfile"]
         if str(explicit_file) == str(explicit_lock_file):
             logger.info(f"Creating the environment {env.display_name}")
-            with CondaOpsManagedCondarc(config["paths"]["condarc"]):
+            with CondaOpsManagedCondarc(condarc):
                 conda_args = ["--prefix", env.prefix, "--file", str(explicit_lock_file)]
                 stdout, stderr, result_code = run_command("create", conda_args, stdout=None)
+                clear_conda_info_cache()
                 if result_code != 0:
                     logger.error(stdout)
                     logger.error(stderr)
@@ -88,30 +96,25 @@ def env_create(config=None, env_name=None, lock_file=None):
         else:
             logger.info("Installing pip managed dependencies...")
 
-            # Workaround for the issue in conda version 23.5.0 (and greater?) see issues.
-            # We need to capture the pip install output to get the exact filenames of the packages
-            with CondaOpsManagedCondarc(config["paths"]["condarc"]):
-                stdout_backup = sys.stdout
-                sys.stdout = capture_output = StringIO()
-                with redirect_stdout(capture_output):
-                    conda_args = ["--prefix", env.prefix, "pip", "install", "-r", str(explicit_file), "--verbose", "--no-cache"]
-                    stdout, stderr, result_code = run_command("run", conda_args, stdout=None)
-                    if result_code != 0:
-                        logger.error(stdout)
-                        logger.error(stderr)
-                        sys.exit(result_code)
-                sys.stdout = stdout_backup
-                stdout_str = capture_output.getvalue()
-                logger.info(stdout_str)
+            with CondaOpsManagedCondarc(condarc):
+                conda_args = ["--prefix", env.prefix, "pip", "install", "-r", str(explicit_file), "--verbose", "--no-cache"]
+                stdout, stderr, result_code = conda_run(conda_args)
+                if result_code != 0:
+                    logger.error(stdout)
+                    logger.error(stderr)
+                    sys.exit(result_code)
+            logger.info(stdout)
 
     delete_explicit_lock_files(config)
     logger.info("Environment created. To activate the environment:")
     logger.info(f">>> conda activate {env.relative_display_name}")
 
 
-def env_clean_temp(env_base_name=None, config=None):
+def env_clean_temp(env_base_name=None, config=None, yes=False):
     """
     Delete temporary environments that may have been created by the lockfile generation process.
+
+    If yes is True, delete them without asking for confirmation.
     """
     if env_base_name is None:
         if config is None:
@@ -120,23 +123,15 @@ def env_clean_temp(env_base_name=None, config=None):
     else:
         env = EnvObject(env_name=env_base_name)
 
-    envs_to_clean = []
     raw_test_env = str(env.prefix) + "-lockfile-generate"
-    conda_info = get_conda_info()
-
-    for i in range(100):
-        test_env_base = raw_test_env + f"-{i}"
-        for env in conda_info["envs"]:
-            if test_env_base in env:
-                if test_env_base == get_prefix(env):
-                    envs_to_clean.append(test_env_base)
+    existing_envs = get_existing_envs()
+    envs_to_clean = [f"{raw_test_env}-{i}" for i in range(100) if Path(f"{raw_test_env}-{i}") in existing_envs]
 
     if len(envs_to_clean) > 0:
         logger.info("The following temporary environments have been found and will be deleted:")
         char = "\n   "
         logger.info(f"   {char.join(envs_to_clean)}")
-        input_value = input("Would you like to proceed? (y/n) ").lower()
-        if input_value == "y":
+        if yes or input("Would you like to proceed? (y/n) ").lower() == "y":
             for env_prefix in envs_to_clean:
                 env_delete(prefix=env_prefix)
                 logger.info(f"Deleted {env_prefix}")
@@ -171,29 +166,27 @@ def env_lock(config=None, lock_file=None, env_name=None, prefix=None, pip_dict=N
 
     # json requirements
     # need to use a subprocess to get any newly installed python package information
-    # that was installed via pip
-    with CondaOpsManagedCondarc(config["paths"]["condarc"]):
-        conda_args = ["--prefix", env.prefix, "--json"]
-        result = subprocess.run(["conda", "list"] + conda_args, capture_output=True, check=False)
-        result_code = result.returncode
-        stdout = result.stdout
-        stderr = result.stderr
+    # that was installed via pip. Start it now so that it runs while we get the explicit requirements.
+    with CondaOpsManagedCondarc(config["paths"]["condarc"]), conda_list_json_process(env.prefix) as conda_list_process:
+        # explicit requirements to get full urls and md5 of conda packages
+        conda_args = ["--prefix", env.prefix, "--explicit", "--md5"]
+        stdout, stderr, result_code = run_command("list", conda_args, use_exception_handler=True)
         if result_code != 0:
             logger.error(stdout)
             logger.error(stderr)
             sys.exit(result_code)
+        explicit_stdout = stdout
 
-    json_reqs = json.loads(stdout)
-
-    # explicit requirements to get full urls and md5 of conda packages
-    with CondaOpsManagedCondarc(config["paths"]["condarc"]):
-        conda_args = ["--prefix", env.prefix, "--explicit", "--md5"]
-        stdout, stderr, result_code = run_command("list", conda_args, use_exception_handler=True)
+        stdout, stderr = conda_list_process.communicate()
+        result_code = conda_list_process.returncode
         if result_code != 0:
             logger.error(stdout)
             logger.error(stderr)
             sys.exit(result_code)
-    explicit = [x for x in stdout.split("\n") if "https" in x]
+
+    json_reqs = json_loads(stdout)
+    # index the explicit lines by their url without the package extension, i.e. base_url/platform/dist_name
+    explicit = {PACKAGE_EXTENSION.sub("", line.rpartition("#")[0]): line for line in EXPLICIT_URL_LINE.findall(explicit_stdout)}
 
     # add additional information to go into the lock file based on the kind of package
     logger.debug(f"Environment to be locked with {len(json_reqs)} packages")
@@ -201,7 +194,6 @@ def env_lock(config=None, lock_file=None, env_name=None, prefix=None, pip_dict=N
     for package in json_reqs:
         conda_spec = LockSpec.from_conda_list(package, platform=platform)
         if conda_spec.channel == "pypi" or conda_spec.channel == "<develop>":
-            package["manager"] = "pip"
             if pip_dict is not None:
                 pip_dict_entry = pip_dict.get(conda_spec.name, None)
                 if pip_dict_entry is not None:
@@ -224,37 +216,34 @@ def env_lock(config=None, lock_file=None, env_name=None, prefix=None, pip_dict=N
                 logger.error("No pip_dict present")
                 new_json_reqs.append(conda_spec.to_lock_entry())
         else:
-            starter_str = "/".join([package["base_url"], package["platform"], package["dist_name"]])
-            line = None
-            for line in explicit:
-                if starter_str in line:
-                    break
+            line = explicit.get(f"{package['base_url']}/{package['platform']}/{package['dist_name']}", None)
             if line:
                 conda_spec.add_conda_explicit_info(line)
             new_json_reqs.append(conda_spec.to_lock_entry())
 
-    blob = json.dumps(new_json_reqs, indent=2, sort_keys=True)
-    with open(lock_file, "w", encoding="utf-8") as jsonfile:
-        jsonfile.write(blob)
+    with open(lock_file, "wb") as jsonfile:
+        json_dump(new_json_reqs, jsonfile)
 
     return new_json_reqs
 
 
-def conda_step_env_lock(channel, config, env_name=None, prefix=None):
+def conda_step_env_lock(channel, config, env_name=None, prefix=None, work_dir=None):
     """
     Given a conda channel from the channel order list, update the environment and generate a new lock file.
+
+    The split requirements are read from, and the intermediate lock file written to, work_dir (by default the ops_dir).
     """
     if env_name is None and prefix is None:
         env = EnvObject(**config["env_settings"], env_dir=config["paths"]["env_dir"])
     else:
         env = EnvObject(env_name=env_name, prefix=prefix, env_dir=config["paths"]["env_dir"])
 
-    ops_dir = config["paths"]["ops_dir"]
+    if work_dir is None:
+        work_dir = config["paths"]["ops_dir"]
 
     logger.info(f"Generating the intermediate lock file for channel:{channel}")
 
-    with open(ops_dir / f".ops.{channel}-environment.txt", encoding="utf-8") as reqsfile:
-        package_list = reqsfile.read().split()
+    package_list = (work_dir / f".ops.{channel}-environment.txt").read_text(encoding="utf-8").split()
 
     if len(package_list) == 0:
         logger.warning("No packages to be installed at this step")
@@ -278,15 +267,17 @@ def conda_step_env_lock(channel, config, env_name=None, prefix=None):
                 logger.error(stderr)
                 return None
 
-    channel_lockfile = ops_dir / f".ops.lock.{channel}"
+    channel_lockfile = work_dir / f".ops.lock.{channel}"
     json_reqs = env_lock(config=config, lock_file=channel_lockfile, env_name=env.name, prefix=env.prefix)
 
     return json_reqs
 
 
-def pip_step_env_lock(channel, config, env_name=None, prefix=None, extra_pip_dict=None):
+def pip_step_env_lock(channel, config, env_name=None, prefix=None, extra_pip_dict=None, work_dir=None):
     """
     Update the environment with the pip requirements and generate a new lock file.
+
+    The split requirements are read from, and the intermediate files written to, work_dir (by default the ops_dir).
     """
     # set the pip interop flag to True as soon as pip packages are to be installed so conda remain aware of it
     # possibly set this at the first creation of the environment so it's always True
@@ -298,27 +289,21 @@ def pip_step_env_lock(channel, config, env_name=None, prefix=None, extra_pip_dic
 
     env_pip_interop(config=config, flag=True)
 
-    ops_dir = config["paths"]["ops_dir"]
-    temp_pip_file = ops_dir / ".temp_pip_report.json"
+    if work_dir is None:
+        work_dir = config["paths"]["ops_dir"]
+    temp_pip_file = work_dir / ".temp_pip_report.json"
     logger.info(f"Generating the intermediate lock file for pip")
 
-    reqs_file = ops_dir / f".ops.{channel}-requirements.txt"
+    reqs_file = work_dir / f".ops.{channel}-requirements.txt"
 
-    # Workaround for the issue in cconda version 23.5.0 (and greater?) see issues.
-    # We need to capture the pip install output to get the exact filenames of the packages
     with CondaOpsManagedCondarc(config["paths"]["condarc"]):
-        stdout_backup = sys.stdout
-        sys.stdout = capture_output = StringIO()
-        with redirect_stdout(capture_output):
-            conda_args = ["--prefix", env.prefix, "pip", "install", "-r", str(reqs_file), "--no-cache", "--report", f"{temp_pip_file}"]
-            stdout, stderr, result_code = run_command("run", conda_args, use_exception_handler=True, stdout=None)
-            if result_code != 0:
-                logger.error(stdout)
-                logger.error(stderr)
-                return None
-        sys.stdout = stdout_backup
-        stdout_str = capture_output.getvalue()
-        print(stdout_str)
+        conda_args = ["--prefix", env.prefix, "pip", "install", "-r", str(reqs_file), "--no-cache", "--report", f"{temp_pip_file}"]
+        stdout, stderr, result_code = conda_run(conda_args)
+        if result_code != 0:
+            logger.error(stdout)
+            logger.error(stderr)
+            return None
+    print(stdout)
 
     pip_dict = extract_pip_info(temp_pip_file, config=config)
     temp_pip_file.unlink(missing_ok=True)
@@ -329,7 +314,7 @@ def pip_step_env_lock(channel, config, env_name=None, prefix=None, extra_pip_dic
             if pip_dict.get(key, None) is None:
                 pip_dict[key] = value
 
-    channel_lockfile = ops_dir / f".ops.lock.{channel}"
+    channel_lockfile = work_dir / f".ops.lock.{channel}"
     json_reqs = env_lock(config, lock_file=channel_lockfile, env_name=env.name, prefix=env.prefix, pip_dict=pip_dict)
 
     return json_reqs, pip_dict
@@ -440,7 +425,9 @@ def env_lockfile_check(config=None, env_consistent=None, lockfile_consistent=Non
 
     logger.debug(f"Enumerating packages from the conda ops environment {env.relative_display_name}")
 
-    with CondaOpsManagedCondarc(config["paths"]["condarc"]):
+    # need to use a subprocess to ensure we get all of the pip package info
+    # start it now so that it runs while we list the conda packages
+    with CondaOpsManagedCondarc(config["paths"]["condarc"]), conda_list_json_process(env.prefix) as conda_list_process:
         conda_args = ["--prefix", env.prefix, "--explicit", "--md5"]
         stdout, stderr, result_code = run_command("list", conda_args, use_exception_handler=True)
         if result_code != 0:
@@ -451,17 +438,26 @@ def env_lockfile_check(config=None, env_consistent=None, lockfile_consistent=Non
                 sys.exit(result_code)
             else:
                 return False, True
+        # collect the pip package info now so the subprocess is finished with before doing anything else
+        pip_list_stdout, pip_list_stderr = conda_list_process.communicate()
+        pip_list_result_code = conda_list_process.returncode
 
-    conda_set = {x for x in stdout.split("\n") if "https" in x}
+    conda_set = set(EXPLICIT_URL_LINE.findall(stdout))
     logger.debug(f"Found {len(conda_set)} conda package(s) in environment: {env.relative_display_name}")
 
+    # load the lock file once for both the explicit lock files and the pip check below
+    info_dict = get_conda_info()
+    platform = info_dict["platform"]
+    with open(config["paths"]["lockfile"], "rb") as jsonfile:
+        lock_list = json_load(jsonfile)
+
     # generate the explicit lock file and load it
-    explicit_files = generate_explicit_lock_files(config)
+    explicit_files = generate_explicit_lock_files(config, platform=platform, json_reqs=lock_list)
     explicit_lock_file = config["paths"]["explicit_lockfile"]
 
     with open(explicit_lock_file, "r", encoding="utf-8") as explicitfile:
         lock_contents = explicitfile.read()
-    lock_set = {x for x in lock_contents.split("\n") if "https" in x}
+    lock_set = set(EXPLICIT_URL_LINE.findall(lock_contents))
 
     if conda_set == lock_set:
         logger.debug("Conda packages in environment and lock file are in sync.\n")
@@ -491,27 +487,16 @@ def env_lockfile_check(config=None, env_consistent=None, lockfile_consistent=Non
 
     # check that the pip contents of the lockfile match the conda environment
 
-    # need to use a subprocess to ensure we get all of the pip package info
-    with CondaOpsManagedCondarc(config["paths"]["condarc"]):
-        conda_args = ["--prefix", env.prefix, "--json"]
-        result = subprocess.run(["conda", "list"] + conda_args, capture_output=True, check=False)
-        result_code = result.returncode
-        stdout = result.stdout
-        stderr = result.stderr
-        if result_code != 0:
-            logger.error(f"Could not get pip packages from the environment {env.relative_display_name}")
-            logger.info(f"stdout: {stdout}")
-            logger.info(f"stderr: {stderr}")
-            if die_on_error:
-                sys.exit(result_code)
-            else:
-                return False, True
-    conda_list = json.loads(stdout)
-
-    conda_dict = {}
-    for package in conda_list:
-        if package["channel"] in ["pypi", "<develop>"]:
-            conda_dict[package["name"]] = package["version"]
+    if pip_list_result_code != 0:
+        logger.error(f"Could not get pip packages from the environment {env.relative_display_name}")
+        logger.info(f"stdout: {pip_list_stdout}")
+        logger.info(f"stderr: {pip_list_stderr}")
+        if die_on_error:
+            sys.exit(pip_list_result_code)
+        else:
+            return False, True
+    # parse the raw bytes directly and keep only the pip installed packages
+    conda_dict = {package["name"]: package["version"] for package in json_loads(pip_list_stdout) if package["channel"] in ("pypi", "<develop>")}
 
     logger.debug(f"Found {len(conda_dict)} pip package(s) in environment: {env.relative_display_name}")
 
@@ -519,34 +504,16 @@ def env_lockfile_check(config=None, env_consistent=None, lockfile_consistent=Non
         env_pip_interop(config=config, flag=True)
 
         logger.debug("Checking consistency of pip installed packages...")
-        lock_dict = {}
-        lockfile = config["paths"]["lockfile"]
-        info_dict = get_conda_info()
-        platform = info_dict["platform"]
-
-        with open(lockfile, "r", encoding="utf-8") as jsonfile:
-            lock_list = json.load(jsonfile)
-        for package in lock_list:
-            if package["manager"] == "pip":
-                if package["platform"] == platform:
-                    lock_dict[package["name"]] = package["version"]
+        lock_dict = {package["name"]: package["version"] for package in lock_list if package["manager"] == "pip" and package["platform"] == platform}
 
         if conda_dict == lock_dict:
             logger.debug("Pip packages in environment and lock file are in sync.\n")
         else:
             check = False
             logger.debug(f"Found {len(lock_dict)} pip package(s) in the lock file")
-            # Find differing package names
-            in_env_names = set(conda_dict.keys()).difference(lock_dict.keys())
-            in_env = [(x, conda_dict[x]) for x in in_env_names]
-            in_lock_names = set(lock_dict.keys()).difference(conda_dict.keys())
-            in_lock = [(x, lock_dict[x]) for x in in_lock_names]
-            # Find differing versions
-            for package in conda_dict:
-                if package in lock_dict:
-                    if conda_dict[package] != lock_dict[package]:
-                        in_env += [(package, conda_dict[package])]
-                        in_lock += [(package, lock_dict[package])]
+            # Find differing package names and versions in one go: the (name, version) pairs that aren't on the other side
+            in_env = list(conda_dict.items() - lock_dict.items())
+            in_lock = list(lock_dict.items() - conda_dict.items())
             if len(in_env) > 0:
                 regenerate = True
                 logger.info("\nThe following pip packages are in the environment but not in the lock file:\n")
@@ -566,11 +533,12 @@ def env_lockfile_check(config=None, env_consistent=None, lockfile_consistent=Non
                     logger.info(">>> conda ops sync")
 
             # Find differing versions
-            differing_versions = {key: (value, lock_dict[key]) for key, value in conda_dict.items() if key in lock_dict and value != lock_dict[key]}
+            differing_versions = {key: (conda_dict[key], lock_dict[key]) for key in conda_dict.keys() & lock_dict.keys() if conda_dict[key] != lock_dict[key]}
             if len(differing_versions) > 0:
-                logger.debug("\nThe following package versions don't match:\n")
-                logger.debug("\n".join([f"{x}: Lock version {lock_dict[x]}, Env version {conda_dict[x]}" for x in differing_versions]))
-                logger.debug("\n")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("\nThe following package versions don't match:\n")
+                    logger.debug("\n".join([f"{x}: Lock version {lock_dict[x]}, Env version {conda_dict[x]}" for x in differing_versions]))
+                    logger.debug("\n")
                 if output_instructions:
                     logger.info("To sync these versions:")
                     logger.info(">>> conda ops sync")
@@ -578,9 +546,10 @@ def env_lockfile_check(config=None, env_consistent=None, lockfile_consistent=Non
         check = False
         regenerate = True
         in_env = conda_dict.keys()
-        logger.debug("\nThe following packages are in the environment but not in the lock file:\n")
-        logger.debug(", ".join(in_env))
-        logger.debug("\n")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("\nThe following packages are in the environment but not in the lock file:\n")
+            logger.debug(", ".join(in_env))
+            logger.debug("\n")
         if output_instructions:
             logger.info("To restore the environment to the state of the lock file")
             logger.info(">>> conda deactivate")
@@ -611,10 +580,12 @@ def env_install(config=None):
     explicit_files = generate_explicit_lock_files(config, lock_file=lock_file)
 
     logger.debug(f"Installing lock file into the environment {env.display_name}")
+    # each config["paths"] lookup re-reads the config file, so look these up once
+    explicit_lock_file = config["paths"]["explicit_lockfile"]
+    condarc = config["paths"]["condarc"]
     for explicit_file in explicit_files:
-        explicit_lock_file = config["paths"]["explicit_lockfile"]
         if str(explicit_file) == str(explicit_lock_file):
-            with CondaOpsManagedCondarc(config["paths"]["condarc"]):
+            with CondaOpsManagedCondarc(condarc):
                 conda_args = ["--prefix", env.prefix, "--file", str(explicit_lock_file)]
                 stdout, stderr, result_code = run_command("install", conda_args, stdout=None)
                 if result_code != 0:
@@ -623,21 +594,14 @@ def env_install(config=None):
                     sys.exit(result_code)
         else:
             logger.debug("Installing pip packages from lock file into the environment")
-            # Workaround for the issue in conda version 23.5.0 (and greater?) see issues.
-            # We need to capture the pip install output to get the exact filenames of the packages
-            with CondaOpsManagedCondarc(config["paths"]["condarc"]):
-                stdout_backup = sys.stdout
-                sys.stdout = capture_output = StringIO()
-                with redirect_stdout(capture_output):
-                    conda_args = ["--prefix", env.prefix, "pip", "install", "-r", str(explicit_file), "--verbose", "--no-cache"]
-                    stdout, stderr, result_code = run_command("run", conda_args, use_exception_handler=True, stdout=None)
-                    if result_code != 0:
-                        logger.error(stdout)
-                        logger.error(stderr)
-                        sys.exit(result_code)
-                sys.stdout = stdout_backup
-                stdout_str = capture_output.getvalue()
-                print(stdout_str)
+            with CondaOpsManagedCondarc(condarc):
+                conda_args = ["--prefix", env.prefix, "pip", "install", "-r", str(explicit_file), "--verbose", "--no-cache"]
+                stdout, stderr, result_code = conda_run(conda_args)
+                if result_code != 0:
+                    logger.error(stdout)
+                    logger.error(stderr)
+                    sys.exit(result_code)
+            print(stdout)
     delete_explicit_lock_files(config)
 
 
@@ -672,6 +636,7 @@ def env_delete(config=None, env_name=None, prefix=None, env_exists=None):
         logger.debug(f"Deleting the conda environment {env.display_name}")
         # no context handling needed to delete an environment
         stdout, stderr, result_code = run_command("remove", "--prefix", env.prefix, "--all", use_exception_handler=True)
+        clear_conda_info_cache()
         if result_code != 0:
             logger.error(stdout)
             logger.error(stderr)
@@ -726,24 +691,30 @@ def json_to_explicit(json_list, config=None, package_manager="conda", platform=N
     if config is None:
         config = proj_load()
 
-    explicit_str = ""
+    explicit_lines = []
+    url_lookup = None
     for package in json_list:
-        lock_package = LockSpec.from_lock_entry(package, config=config)
+        # load the url lookup once, and only if there are local urls
+        if url_lookup is None and str(package.get("url", None)).startswith("local://"):
+            url_lookup = load_url_lookup(config=config)
+        lock_package = LockSpec.from_lock_entry(package, config=config, url_lookup=url_lookup)
         if lock_package.check_consistency():
             if lock_package.platform == platform:
                 if lock_package.manager == package_manager:
                     if hash_exists == lock_package.hash_exists:
-                        explicit_str += lock_package.to_explicit() + "\n"
+                        explicit_lines.append(lock_package.to_explicit())
         else:
             logger.error("Failed to convert json to explicit lock file")
             sys.exit(1)
-    return explicit_str
+    return "".join(f"{line}\n" for line in explicit_lines)
 
 
-def generate_explicit_lock_files(config=None, lock_file=None, platform=None):
+def generate_explicit_lock_files(config=None, lock_file=None, platform=None, json_reqs=None):
     """
     Generate an explicit lock files from the usual one (aka. of the format generated by `conda list --explicit`
     for conda and `package_name @ URL --hash=sha256:hash_value` for pip
+
+    If the contents of the lock file have already been loaded, pass them as json_reqs to avoid reading it again.
     """
     if config is None:
         config = proj_load()
@@ -751,18 +722,24 @@ def generate_explicit_lock_files(config=None, lock_file=None, platform=None):
     logger.debug("Creating explicit lock file(s)")
     if lock_file is None:
         lock_file = config["paths"]["lockfile"]
+    # look the platform up once rather than in each call to json_to_explicit
+    if platform is None:
+        platform = get_conda_info()["platform"]
 
-    with open(lock_file, "r", encoding="utf-8") as jsonfile:
-        json_reqs = json.load(jsonfile)
+    if json_reqs is None:
+        with open(lock_file, "rb") as jsonfile:
+            json_reqs = json_load(jsonfile)
 
     # conda lock file
-    explicit_str = "# This file may be used to create an environment using:\n\
-    # $ conda create --name <env> --file <this file>\n@EXPLICIT\n"
-    explicit_str += json_to_explicit(json_reqs, config=config, package_manager="conda", platform=platform, hash_exists=True)
+    explicit_parts = [
+        "# This file may be used to create an environment using:\n\
+    # $ conda create --name <env> --file <this file>\n@EXPLICIT\n",
+        json_to_explicit(json_reqs, config=config, package_manager="conda", platform=platform, hash_exists=True),
+    ]
 
     explicit_lock_file = config["paths"]["explicit_lockfile"]
-    with open(explicit_lock_file, "w", encoding="utf-8") as explicitfile:
-        explicitfile.write(explicit_str)
+    with open(explicit_lock_file, "wb") as explicitfile:
+        explicitfile.write("".join(explicit_parts).encode("utf-8"))
     lockfiles = [explicit_lock_file]
 
     # pypi lock file
@@ -773,12 +750,42 @@ def generate_explicit_lock_files(config=None, lock_file=None, platform=None):
                 pip_lock_file = config["paths"]["pip_explicit_lockfile"]
             else:
                 pip_lock_file = config["paths"]["nohash_explicit_lockfile"]
-            with open(pip_lock_file, "w", encoding="utf-8") as explicitfile:
-                explicitfile.write(pip_reqs)
+            with open(pip_lock_file, "wb") as explicitfile:
+                explicitfile.write(pip_reqs.encode("utf-8"))
             lockfiles.append(pip_lock_file)
     return lockfiles
 
 
+@contextmanager
+def conda_list_json_process(prefix):
+    """
+    Start `conda list --json` for the environment at prefix in a subprocess, so that it can run while other
+    work is done, and yield the Popen object. Collect its output with communicate() inside the with block.
+
+    If the block is left before the output has been collected (an error, an exception or sys.exit), the
+    subprocess is killed and reaped so that it is never left blocked on a full pipe.
+    """
+    process = subprocess.Popen(["conda", "list", "--prefix", str(prefix), "--json"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        yield process
+    finally:
+        if process.returncode is None:
+            process.kill()
+            process.communicate()
+
+
+def conda_run(conda_args):
+    """
+    Run `conda run` in a subprocess with the given arguments and return (stdout, stderr, result_code).
+
+    Workaround for the issue in conda version 23.5.0 (and greater?) see issues. Run in process, `conda run`
+    prints the output of the command rather than returning it, so run it as a subprocess to capture the
+    command's own output, e.g. to get the exact filenames of pip installed packages.
+    """
+    result = subprocess.run(["conda", "run"] + conda_args, capture_output=True, text=True)
+    return result.stdout, result.stderr, result.returncode
+
+
 def delete_explicit_lock_files(config=None):
     """
     Delete the explicit lock files that are generated by generate_explicit_lock_files. These are mainly
@@ -801,10 +808,10 @@ def extract_pip_info(json_input, config=None, platform=None):
     json_input can be a filename, path or
     """
     if isinstance(json_input, str):
-        pip_info = json.loads(json_input)
+        pip_info = json_loads(json_input)
     elif Path(json_input).exists():
-        with open(json_input, "r", encoding="utf-8") as json_handle:
-            pip_info = json.load(json_handle)
+        with open(json_input, "rb") as json_handle:
+            pip_info = json_load(json_handle)
     else:
         logger.error(f"Unrecognized input format: {json_input}")
         sys.exit(1)
@@ -16,7 +16,6 @@ Please note that this module depends on other modules and packages within the pr
 before using the functions in this module.
 """
 
-import json
 import sys
 
 from conda.models.version import ver_eval
@@ -24,9 +23,9 @@ from packaging.version import parse
 
 from .commands_reqs import reqs_check
 from .env_handler import get_conda_info
-from .requirements import PackageSpec, LockSpec
+from .requirements import PackageSpec, LockSpec, load_url_lookup
 from .split_requirements import env_split, get_conda_channel_order
-from .utils import yaml, logger
+from .utils import json_load, yaml_safe_load_file, logger
 
 
 ##################################################################
@@ -50,10 +49,11 @@ def lockfile_check(config, die_on_error=True, output_instructions=True, platform
     consistency_dict = {}
 
     if lock_file.exists():
-        with open(lock_file, "r", encoding="utf-8") as lockfile:
+        with open(lock_file, "rb") as lockfile:
             try:
-                json_reqs = json.load(lockfile)
+                json_reqs = json_load(lockfile)
             except Exception as exception:
+                json_reqs = None
                 check = False
                 logger.warning(f"Unable to load lockfile {lock_file}")
                 logger.debug(exception)
@@ -121,16 +121,21 @@ def lock_package_consistency_check(lockfile_json_reqs, config, platform):
     """
     consistency_dict = {"inconsistent": [], "no_url": [], "no_url_lookup": [], "platform_in_lockfile": False}
 
+    url_lookup = None
     for package in lockfile_json_reqs:
-        lock_package = LockSpec.from_lock_entry(package, config=config)
-        if lock_package.platform == platform:
-            consistency_dict["platform_in_lockfile"] = True
-            if not lock_package.check_consistency():
-                consistency_dict["inconsistent"].append(lock_package)
-            if lock_package.url is None:
-                consistency_dict["no_url"].append(lock_package)
-            if lock_package.url == "":
-                consistency_dict["no_url_lookup"].append(lock_package)
+        if package.get("platform", None) != platform:
+            continue
+        # load the url lookup once, and only if there are local urls
+        if url_lookup is None and str(package.get("url", None)).startswith("local://"):
+            url_lookup = load_url_lookup(config=config)
+        lock_package = LockSpec.from_lock_entry(package, config=config, url_lookup=url_lookup)
+        consistency_dict["platform_in_lockfile"] = True
+        if not lock_package.check_consistency():
+            consistency_dict["inconsistent"].append(lock_package)
+        if lock_package.url is None:
+            consistency_dict["no_url"].append(lock_package)
+        if lock_package.url == "":
+            consistency_dict["no_url_lookup"].append(lock_package)
 
     return consistency_dict
 
@@ -152,7 +157,10 @@ def lockfile_reqs_check(config, reqs_consistent=None, lockfile_consistent=None,
     if lockfile_consistent and reqs_consistent:
         ## TODO: I think this can be removed since we explicitly check if the lockfile
         ## satisfies the requirements
-        if requirements_file.stat().st_mtime <= lock_file.stat().st_mtime:
+        # Note: a lock file that is newer than the requirements can still be missing requirements (e.g. if it was
+        # edited or copied in), so this is not a shortcut for the check below. The requirements were already parsed
+        # by reqs_check, so loading them again below is a cache hit rather than a second parse.
+        if requirements_file.stat().st_mtime_ns <= lock_file.stat().st_mtime_ns:
             logger.debug("Lock file is newer than the requirements file")
         else:
             check = False
@@ -160,47 +168,45 @@ def lockfile_reqs_check(config, reqs_consistent=None, lockfile_consistent=None,
             if output_instructions:
                 logger.info("To update the lock file:")
                 logger.info(">>> conda ops sync")
-        with open(requirements_file, "r", encoding="utf-8") as yamlfile:
-            reqs_env = yaml.load(yamlfile)
+        reqs_env = yaml_safe_load_file(requirements_file)
         channel_order = get_conda_channel_order(reqs_env)
         _, channel_dict = env_split(reqs_env, channel_order)
-        with open(lock_file, "r", encoding="utf-8") as jsonfile:
-            lock_dict = json.load(jsonfile)
+        with open(lock_file, "rb") as jsonfile:
+            lock_dict = json_load(jsonfile)
+
+        # index the lock entries by name once; the first entry for a name wins
+        lock_by_name = {}
+        for lock_package in lock_dict:
+            lock_by_name.setdefault(lock_package["name"], lock_package)
+        lock_urls = [lock_package.get("url") or "" for lock_package in lock_dict]
 
         # so far we don't check that the channel info is correct, just that the package is there
         missing_packages = []
-        for channel in channel_order + ["pip"]:
-            channel_list = [PackageSpec(req, channel=channel) for req in channel_dict[channel]]
-            for package in channel_list:
-                missing = True
-                check_version = False
-                for lock_package in lock_dict:
-                    if package.is_pathspec:
-                        # this is a url based requirement
-                        # look for the spec in the package url
-                        if package.requirement.spec in lock_package["url"]:
-                            missing = False
-                    else:
-                        try:
-                            package_name = package.name
-                        except AttributeError as e:
-                            print(e)
-                            ## Unimplimented for now
-                            package_name = None
-                        if package_name == lock_package["name"]:
-                            # find the matching package
-                            missing = False
-                            check_version = True
-                            break
-                if missing:
+        channel_packages = [
+            (channel, PackageSpec(req, channel=channel)) for channel in channel_order + ["pip"] for req in channel_dict[channel]
+        ]
+        for channel, package in channel_packages:
+            if package.is_pathspec:
+                # this is a url based requirement
+                # look for the spec in the package url
+                if not any(package.requirement.spec in url for url in lock_urls):
+                    missing_packages.append(package)
+                continue
+            try:
+                package_name = package.name
+            except AttributeError as e:
+                print(e)
+                ## Unimplimented for now
+                package_name = None
+            lock_package = lock_by_name.get(package_name, None)
+            if lock_package is None:
+                missing_packages.append(package)
+            elif channel == "pip":
+                if not parse(lock_package["version"]) in package.version:
+                    missing_packages.append(package)
+            else:
+                if package.version and not ver_eval(lock_package["version"], str(package.version)):
                     missing_packages.append(package)
-                if check_version:
-                    if channel == "pip":
-                        if not parse(lock_package["version"]) in package.version:
-                            missing_packages.append(package)
-                    else:
-                        if package.version and not ver_eval(lock_package["version"], str(package.version)):
-                            missing_packages.append(package)
 
         if len(missing_packages) > 0:
             check = False
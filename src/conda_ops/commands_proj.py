@@ -14,11 +14,9 @@ Please note that this module relies on other modules and packages within the pro
 .utils, and .kvstore. Make sure to install the necessary dependencies before using the functions in this module.
 """
 
-import json
 from pathlib import Path
 import os
 import sys
-import traceback
 
 from .kvstore import KVStore
 from ._paths import PathStore
@@ -62,7 +60,11 @@ def proj_create(prefix="", input_value=None):
     """
     conda_ops_path = Path.cwd() / CONDA_OPS_DIR_NAME
 
-    if conda_ops_path.exists():
+    # try to create the directory directly rather than checking whether it exists first
+    try:
+        conda_ops_path.mkdir()
+        overwrite = False
+    except FileExistsError:
         logger.warning("conda ops has already been initialized")
         if input_value is None:
             overwrite_value = input("Would you like to reinitialize (this will overwrite the existing conda-ops basic setup)? (y/n) ").lower()
@@ -72,9 +74,6 @@ def proj_create(prefix="", input_value=None):
             return proj_load(), False
         else:
             overwrite = True
-    else:
-        conda_ops_path.mkdir()
-        overwrite = False
 
     if overwrite:
         logger.info("Re-initializing conda ops project")
@@ -84,8 +83,8 @@ def proj_create(prefix="", input_value=None):
     # setup initial config
     config_file = conda_ops_path / CONFIG_FILENAME
 
-    if overwrite and config_file.exists():
-        config_file.unlink()
+    if overwrite:
+        config_file.unlink(missing_ok=True)
 
     # currently defaults to creating an env_name based on the location of the project
     env_name = Path.cwd().name.lower()
@@ -258,7 +257,7 @@ def find_conda_ops_dir(die_on_error=True):
 
 def find_upwards(cwd, filename):
     """
-    Search recursively for a file/directory.
+    Search for a file/directory.
 
     Start searching in current directory, then upwards through all parents,
     stopping at the root directory.
@@ -273,12 +272,13 @@ def find_upwards(cwd, filename):
     pathlib.Path, the location of the first file found or
     None, if none was found
     """
-    if cwd == cwd.parent or cwd == Path(cwd.root):
-        return None
-
-    fullpath = cwd / filename
-
-    try:
-        return fullpath if fullpath.exists() else find_upwards(cwd.parent, filename)
-    except RecursionError:
-        return None
+    # work with strings and only create a Path for the result, since this probes every parent directory
+    directory = os.fspath(cwd)
+    while True:
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        fullpath = os.path.join(directory, filename)
+        if os.path.exists(fullpath):
+            return Path(fullpath)
+        directory = parent
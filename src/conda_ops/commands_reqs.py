@@ -13,7 +13,9 @@ The main functions provided by this module are as follows.
   - reqs_check(config, die_on_error=True): Check for the existence and consistency of the requirements file.
 
 - Helper Functions:
+  - pip_package_name(spec): Return the conda name of the package of a pip requirement spec.
   - check_package_in_list(package, package_list, channel=None): Given a package, return the packages in the package_list that match the name of that requirement.
+  - index_package_list(package_list, channel=None): Index a package list so that matching packages can be found without a scan.
   - clean_package_args(package_args, channel=None): Clean and validate a list of package arguments.
   - pop_pip_section(dependencies): Given the dependencies section of the YAML requirements file, pop the pip section from the dependencies.
   - check_for_duplicates(package_list): Check for duplicate packages in a package list.
@@ -21,6 +23,7 @@ The main functions provided by this module are as follows.
 Please note that this module relies on other modules and packages within the project, such as .utils.
 """
 
+from io import StringIO
 from pathlib import Path
 import os
 import subprocess
@@ -28,7 +31,7 @@ import sys
 
 from .requirements import PackageSpec, is_url_requirement
 
-from .utils import yaml, logger, is_url_requirement
+from .utils import yaml, yaml_safe_load_file, clear_yaml_cache, logger, is_url_requirement
 
 ##################################################################
 #
@@ -58,6 +61,12 @@ def reqs_add(packages, config=None):
 
     invalid_channel = []
     package_entry_list = []
+    conda_added = False
+    pip_added = False
+
+    # index the existing requirements once rather than scanning them for every package
+    conda_index = index_package_list(reqs["dependencies"])
+    pip_index = index_package_list(pip_dict["pip"], channel="pip") if pip_dict is not None else {}
 
     for package in packages:
         # check for existing packages and remove them if they have a name match
@@ -66,7 +75,7 @@ def reqs_add(packages, config=None):
         package_entry = package.to_reqs_entry()
         package_entry_list.append(package_entry)
         if not package.is_pathspec:
-            conflicts = check_package_in_list(package, reqs["dependencies"])
+            conflicts = conda_index.get(package_index_key(package), [])
         else:
             if channel != "pip":
                 invalid_channel.append(package_entry)
@@ -75,10 +84,7 @@ def reqs_add(packages, config=None):
                 logger.info(f">>> conda ops reqs add --pip {package}")
             conflicts = []
 
-        if pip_dict is not None:
-            pip_conflicts = check_package_in_list(package, pip_dict["pip"], channel="pip")
-        else:
-            pip_conflicts = []
+        pip_conflicts = pip_index.get(package_index_key(package), [])
         if package_entry not in invalid_channel:
             if len(conflicts) > 0 or len(pip_conflicts) > 0:
                 logger.warning(f"Package {package} is in the existing requirements as {' '.join(conflicts)} {' pip::'.join(pip_conflicts)}")
@@ -88,29 +94,36 @@ def reqs_add(packages, config=None):
                 for conflict in pip_conflicts:
                     pip_dict["pip"].remove(conflict)
 
-            # add package
+            # add package; the lists are sorted once after all of the packages are added
             if channel == "pip":
                 if pip_dict is None:
                     pip_dict = {"pip": [package_entry]}
                 else:
-                    if len(pip_dict["pip"]) == 0:
-                        pip_dict["pip"] = [package_entry]
-                    else:
-                        pip_dict["pip"] = sorted(pip_dict["pip"] + [package_entry])
+                    pip_dict["pip"].append(package_entry)
+                    pip_added = True
             else:  # interpret channel as a conda channel
                 if reqs["dependencies"] is None:
                     reqs["dependencies"] = [package_entry]
                 else:
-                    reqs["dependencies"] = sorted(reqs["dependencies"] + [package_entry])
+                    reqs["dependencies"].append(package_entry)
+                    conda_added = True
                 if channel not in reqs["channels"]:
                     reqs["channels"].append(channel)
 
+    if pip_added:
+        pip_dict["pip"] = sorted(pip_dict["pip"])
+    if conda_added:
+        reqs["dependencies"] = sorted(reqs["dependencies"])
+
     # add back the pip section
     if pip_dict is not None:
         reqs["dependencies"] = [pip_dict] + reqs["dependencies"]
 
-    added_packages = list(set(package_entry_list).difference(invalid_channel))
+    # dedupe while keeping the order the packages were given in
+    invalid_entries = set(invalid_channel)
+    added_packages = [entry for entry in dict.fromkeys(package_entry_list) if entry not in invalid_entries]
     if len(added_packages) > 0:
+        clear_yaml_cache(requirements_file)
         with open(requirements_file, "w", encoding="utf-8") as yamlfile:
             yaml.dump(reqs, yamlfile)
         logger.info("Added the following packages to the requirements file:")
@@ -140,39 +153,32 @@ def reqs_remove(packages, config=None):
     # pull off the pip section ot keep it at the beginning of the reqs file
     reqs["dependencies"], pip_dict = pop_pip_section(reqs["dependencies"])
 
-    # first remove non-pip dependencies
-
-    deps = list(set(reqs["dependencies"]))
-    for package in packages:
-        if not is_url_requirement(package):
-            for dep in deps:
-                if PackageSpec(dep, manager="conda").conda_name == PackageSpec(package, manager="conda").conda_name:
-                    deps.remove(dep)
-                    removed_packages.append(dep)
+    # first remove non-pip dependencies, keeping track of the channels still in use as we go
+    # (only parse the dependencies when there are conda packages to remove)
+    conda_names = {PackageSpec(package, manager="conda").conda_name for package in packages if not is_url_requirement(package)}
+    deps = []
+    channel_in_use = set()
+    for dep in reqs["dependencies"]:
+        if conda_names and PackageSpec(dep, manager="conda").conda_name in conda_names:
+            removed_packages.append(dep)
+        else:
+            deps.append(dep)
+            if "::" in dep:
+                channel_in_use.add(dep.split("::")[0])
     reqs["dependencies"] = sorted(deps)
 
     # remove any channels that aren't needed anymore
-    channel_in_use = []
-    for dep in deps:
-        if "::" in dep:
-            channel, _ = dep.split("::")
-            channel_in_use.append(channel)
-    new_channel_order = []
-    for channel in reqs["channels"]:
-        if channel == "defaults":
-            new_channel_order.append(channel)
-        if channel in channel_in_use:
-            new_channel_order.append(channel)
-    reqs["channels"] = new_channel_order
+    reqs["channels"] = [channel for channel in reqs["channels"] if channel == "defaults" or channel in channel_in_use]
 
     # now remove pip dependencies if the section exists
     if pip_dict is not None:
-        deps = list(set(pip_dict["pip"]))
-        for package in packages:
-            for dep in deps:
-                if PackageSpec(dep, manager="pip").conda_name == PackageSpec(package, manager="pip").conda_name:
-                    deps.remove(dep)
-                    removed_packages.append(dep)
+        pip_names = {pip_package_name(package) for package in packages}
+        deps = []
+        for dep in pip_dict["pip"]:
+            if pip_names and pip_package_name(dep) in pip_names:
+                removed_packages.append(dep)
+            else:
+                deps.append(dep)
         pip_dict["pip"] = sorted(deps)
 
     # add back the pip section
@@ -181,6 +187,7 @@ def reqs_remove(packages, config=None):
             reqs["dependencies"] = [pip_dict] + reqs["dependencies"]
 
     if len(removed_packages) > 0:
+        clear_yaml_cache(requirements_file)
         with open(requirements_file, "w", encoding="utf-8") as yamlfile:
             yaml.dump(reqs, yamlfile)
 
@@ -204,6 +211,7 @@ def reqs_create(config):
             "dependencies": sorted(["pip", "python"]),
         }
         logger.info(f"Creating requirements file: {requirements_file}")
+        clear_yaml_cache(requirements_file)
         with open(requirements_file, "w", encoding="utf-8") as yamlfile:
             yaml.dump(requirements_dict, yamlfile)
     else:
@@ -221,8 +229,8 @@ def reqs_check(config, die_on_error=True):
 
     check = True
     if requirements_file.exists():
-        with open(requirements_file, "r", encoding="utf-8") as yamlfile:
-            requirements = yaml.load(yamlfile)
+        requirements = yaml_safe_load_file(requirements_file)
+        updates = {}
         if not requirements["name"] == env_name:
             logger.error(
                 f"The name in the requirements file {requirements['name']} does not match \
@@ -230,8 +238,7 @@ def reqs_check(config, die_on_error=True):
             )
             if input("Would you like to update the environment name in your requirements file (y/n) ").lower() == "y":
                 requirements["name"] = env_name
-                with open(requirements_file, "w", encoding="utf-8") as yamlfile:
-                    yaml.dump(requirements, yamlfile)
+                updates["name"] = env_name
             else:
                 logger.warning(f"Please check the consistency of your requirements file {requirements_file} manually.")
                 check = False
@@ -244,33 +251,31 @@ def reqs_check(config, die_on_error=True):
 
         channel_order = requirements.get("channels", [])
 
-        # check that the package specifications are valid
-        # make the specifications cannonical (warn when changing them)
-        valid_specs = []
+        # check that the package specifications are valid, counting the packages by name as we go
+        # so that duplicates can be found without a second pass
         invalid_specs = []
-        package_name_list = []
+        package_counts = {}
         missing_channel_list = []
+        known_channels = set(channel_order)
         for package in conda_deps:
             try:
                 req = PackageSpec(package, manager="conda")
-                valid_specs.append(str(req))
-                package_name_list.append(req.name)
+                package_counts[req.name] = package_counts.get(req.name, 0) + 1
                 channel = req.channel
-                if channel not in channel_order + missing_channel_list:
+                if channel not in known_channels:
+                    known_channels.add(channel)
                     missing_channel_list.append(channel)
             except Exception as exception:
                 check = False
                 print(exception)
                 invalid_specs.append(package)
-        valid_pip_specs = []
         if pip_dict is not None:
             pip_deps = pip_dict.get("pip", None)
             for package in pip_deps:
                 try:
                     req = PackageSpec(package, manager="pip")
-                    valid_pip_specs.append(str(req))
                     if not req.is_pathspec:
-                        package_name_list.append(req.name)
+                        package_counts[req.name] = package_counts.get(req.name, 0) + 1
                 except Exception as exception:
                     check = False
                     print(exception)
@@ -281,24 +286,31 @@ def reqs_check(config, die_on_error=True):
             logger.info("Please manually update them accordingly.")
 
         # check for duplicate packages
-        duplicates = check_for_duplicates(package_name_list)
+        duplicates = [name for name, count in package_counts.items() if count > 1]
 
         if len(duplicates) > 0:
             check = False
-            logger.error(f"The packages {' ,'.join(list(duplicates.keys()))} have been specified more than once.")
+            logger.error(f"The packages {' ,'.join(duplicates)} have been specified more than once.")
             logger.info(f"Please update the requirements file {requirements_file} accordingly.")
         if len(missing_channel_list) > 0:
             logger.warning(f"The following channels are not in the channel section: {missing_channel_list}")
             if input("Would you like to add the missing channels your requirements file (y/n) ").lower() == "y":
-                if pip_dict is not None:
-                    requirements["dependencies"] = [pip_dict] + conda_deps
-                requirements["channels"] = channel_order + missing_channel_list
-                with open(requirements_file, "w", encoding="utf-8") as yamlfile:
-                    yaml.dump(requirements, yamlfile)
+                updates["channels"] = channel_order + missing_channel_list
             else:
                 logger.warning(f"Please update your requirements file {requirements_file} manually.")
                 check = False
 
+        # write any accepted fixes in one go, and only if there are any
+        if len(updates) > 0:
+            # reload with the round trip loader to keep the comments and formatting of the file
+            with open(requirements_file, "r", encoding="utf-8") as yamlfile:
+                rt_requirements = yaml.load(yamlfile)
+            for key, value in updates.items():
+                rt_requirements[key] = value
+            clear_yaml_cache(requirements_file)
+            with open(requirements_file, "w", encoding="utf-8") as yamlfile:
+                yaml.dump(rt_requirements, yamlfile)
+
     else:
         check = False
         logger.warning("No requirements file present")
@@ -316,9 +328,10 @@ def reqs_list(config):
     try:
         with open(config["paths"]["requirements"], "r", encoding="utf-8") as yamlfile:
             reqs = yaml.load(yamlfile)
-            print("\n")
-            yaml.dump(reqs, sys.stdout)
-            print("\n")
+        # build the output first so it is written in a single call
+        output = StringIO()
+        yaml.dump(reqs, output)
+        sys.stdout.write(f"\n\n{output.getvalue()}\n\n")
     except FileNotFoundError:
         print(f"Requirements file not found.")
         sys.exit(1)
@@ -332,6 +345,7 @@ def reqs_edit(config):
     """
     filename = config["paths"]["requirements"]
     open_file_in_editor(filename)
+    clear_yaml_cache(filename)
 
 
 ############################################
@@ -341,6 +355,18 @@ def reqs_edit(config):
 ############################################
 
 
+def pip_package_name(spec):
+    """
+    Return the conda name of the package of a pip requirement spec.
+
+    Url based requirements don't have a name, so return the normalized spec for them instead.
+    """
+    package = PackageSpec(spec, manager="pip")
+    if package.is_pathspec:
+        return str(package)
+    return package.conda_name
+
+
 def check_package_in_list(package, package_list, channel=None):
     """
     Given a package, return the packages in the package_list that match that requirement.
@@ -363,6 +389,28 @@ def check_package_in_list(package, package_list, channel=None):
     return matching_list
 
 
+def index_package_list(package_list, channel=None):
+    """
+    Index the packages in package_list by name (or by spec for url based requirements), so that the matches
+    for many packages can be looked up without scanning and parsing the whole list for each one.
+
+    Returns a dict of key: list of matching packages. Look up a requirement with package_index_key.
+    """
+    index = {}
+    for comp_package in package_list:
+        index.setdefault(package_index_key(PackageSpec(comp_package, channel=channel)), []).append(comp_package)
+    return index
+
+
+def package_index_key(package):
+    """
+    The key of a PackageSpec in an index from index_package_list. Same matching as check_package_in_list.
+    """
+    if package.is_pathspec:
+        return package.spec
+    return package.name
+
+
 def clean_package_args(package_args, channel=None):
     """
     Given a list of packages from the argparser, check that it is in a valid format.
@@ -405,10 +453,9 @@ def clean_package_args(package_args, channel=None):
 
     # check for duplicate packages
     # only looks for duplicates in named packages
-    str_packages = [x.name for x in cleaned_packages if x.name is not None]
-    duplicates = check_for_duplicates(str_packages)
+    duplicates = check_for_duplicates(x.name for x in cleaned_packages if x.name is not None)
     if len(duplicates) > 0:
-        logger.error(f"The packages {' '.join(list(duplicates.keys()))} have been specified more than once.")
+        logger.error(f"The packages {' '.join(duplicates)} have been specified more than once.")
         sys.exit(1)
 
     return cleaned_packages
@@ -425,26 +472,27 @@ def pop_pip_section(dependencies):
     # pull off the pip section ot keep it at the beginning of the reqs file
     pip_dict = None
     for k, dep in enumerate(dependencies):
-        if isinstance(dep, dict):  # nested yaml
-            if dep.get("pip", None):
-                pip_dict = dependencies.pop(k)
-                break
+        if isinstance(dep, dict) and dep.get("pip", None):  # nested yaml
+            pip_dict = dep
+            del dependencies[k]
+            break
     return dependencies, pip_dict
 
 
 def check_for_duplicates(package_list):
     """
-    Given a list of packages, look for duplicates and return the indices of the packages.
+    Given a list (or any iterable) of packages, return the packages that appear more than once, in the order
+    they are first repeated.
     """
-    # check for duplicate packages
-    item_indices = {}
-    for i, item in enumerate(package_list):
-        if item in item_indices:
-            item_indices[item].append(i)
+    seen = set()
+    # use a dict as an ordered set so that error messages are deterministic
+    duplicates = {}
+    for item in package_list:
+        if item in seen:
+            duplicates[item] = None
         else:
-            item_indices[item] = [i]
-    duplicates = {item: indices for item, indices in item_indices.items() if len(indices) > 1}
-    return duplicates
+            seen.add(item)
+    return list(duplicates)
 
 
 def open_file_in_editor(filename, editor=None):
@@ -6,7 +6,7 @@ from conda.common.serialize import yaml_round_trip_load, yaml_round_trip_dump
 from conda.common.iterators import groupby_to_dict as groupby
 from conda.common.compat import isiterable
 
-from .utils import logger, align_and_print_data
+from .utils import logger, align_and_print_data, yaml_safe_load_file
 from .python_api import run_command
 from .env_handler import CondaOpsManagedCondarc
 
@@ -195,7 +195,7 @@ def check_config_items_match(config_map=None, total_test=False):
     # check the whitelist sections
     whitelist_categories = ["Channel Configuration", "Solver Configuration"]
 
-    channel_match = sorted(WHITELIST_CHANNEL + NEW_CHANNEL) == sorted(list(config_map["Channel Configuration"]))
+    channel_match = sorted(WHITELIST_CHANNEL + NEW_CHANNEL) == sorted(config_map["Channel Configuration"])
     if not channel_match:
         conda_set = set(config_map["Channel Configuration"])
         ops_set = set(WHITELIST_CHANNEL + NEW_CHANNEL)
@@ -210,7 +210,7 @@ def check_config_items_match(config_map=None, total_test=False):
         if len(extra_ops) > 0:
             logger.debug(f"The following channel configurations are missing from conda: {list(extra_ops)}")
 
-    solver_match = sorted(WHITELIST_SOLVER) == sorted(list(config_map["Solver Configuration"]))
+    solver_match = sorted(WHITELIST_SOLVER) == sorted(config_map["Solver Configuration"])
     if not solver_match:
         conda_set = set(config_map["Solver Configuration"])
         ops_set = set(WHITELIST_SOLVER)
@@ -361,6 +361,11 @@ def env_pip_interop(config=None, flag=True):
     Set the flag pip_interop_enabled to the value of flag locally for the conda ops managed environment
     """
     condarc_path = config["paths"]["condarc"]
+    # skip the conda config call if the flag is already set to the value, as it is in the generated .condarc
+    if condarc_path.exists():
+        condarc = yaml_safe_load_file(condarc_path)
+        if condarc is not None and condarc.get("pip_interop_enabled", None) == flag:
+            return True
     conda_args = ["--set", "pip_interop_enabled", str(flag), "--file", str(condarc_path)]
 
     stdout, stderr, result_code = run_command("config", conda_args, use_exception_handler=True)
@@ -397,9 +402,7 @@ def condaops_config_manage(argv: list, args, config=None):
     file_args = ["--file", str(config["paths"]["condarc"])]
 
     if args.show is not None:
-        print("\n")
-        print(yaml_round_trip_dump(yaml_round_trip_load(config["paths"]["condarc"])))
-        print("\n")
+        sys.stdout.write(f"\n\n{yaml_round_trip_dump(yaml_round_trip_load(config['paths']['condarc']))}\n\n\n")
     if args.show_sources or args.validate:
         # fall through directly, but add $CONDARC to make sure we use the condaops settings
         conda_args = argv + file_args
@@ -426,9 +429,7 @@ def condaops_config_manage(argv: list, args, config=None):
             logger.error(stdout)
             logger.error(stderr)
             sys.exit(result_code)
-        print("\n")
-        print(stdout)
-        print(stderr)
+        sys.stdout.write(f"\n\n{stdout}\n{stderr}\n")
     if args.get is not None:
         # get the config values of the parameters listed. default to WHITELIST if no args given.
         # only checks for values in the conda ops managed list.
@@ -441,8 +442,7 @@ def condaops_config_manage(argv: list, args, config=None):
             logger.error(stdout)
             logger.error(stderr)
             sys.exit(result_code)
-        print(stdout)
-        print(stderr)
+        sys.stdout.write(f"{stdout}\n{stderr}\n")
     if args.append or args.prepend or args.set or args.remove:
         # check that the keys are in the WHITELIST and then pass to conda to edit the .condarc file
         # prepend, append, add
@@ -483,5 +483,4 @@ def condaops_config_manage(argv: list, args, config=None):
             print(stdout)
         if len(not_in_whitelist) > 0:
             gap = "\n- "
-            print("The following parameters are not recognized in the conda ops managed config:\n" f"- {gap.join(not_in_whitelist)}")
-            print("To manage them use `conda config` instead.")
+            sys.stdout.write(f"The following parameters are not recognized in the conda ops managed config:\n- {gap.join(not_in_whitelist)}\nTo manage them use `conda config` instead.\n")
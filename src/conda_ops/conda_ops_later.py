@@ -27,8 +27,8 @@ def conda_ops_later(argv: list):
     elif args.command == "deactivate":
         env_deactivate(config)
     elif args.command == "delete":
-        if input("Are you sure you want to delete your conda environment? (y/n) ").lower() != "y":
-            exit()
+        if not args.yes and input("Are you sure you want to delete your conda environment? (y/n) ").lower() != "y":
+            sys.exit()
         else:
             env_delete(config=config)
             print("To create the environment again:")
@@ -120,6 +120,7 @@ def configure_parser_deactivate(subparsers):
 def configure_parser_delete(subparsers):
     descr = "Delete the conda environment"
     p = subparsers.add_parser("delete", description=descr, help=descr)
+    p.add_argument("-y", "--yes", action="store_true", help="Delete without asking for confirmation.")
     return p
 
 
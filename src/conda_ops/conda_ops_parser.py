@@ -1,145 +1,208 @@
 import argparse
-import conda.plugins
+import functools
 
-from .commands import consistency_check, lockfile_generate, sync
-from .commands_proj import proj_load, proj_create
-from .commands_reqs import reqs_create, reqs_add, reqs_remove, reqs_list, reqs_edit
-from .commands_lockfile import lockfile_check, lockfile_reqs_check
-from .commands_env import (
-    env_activate,
-    env_deactivate,
-    env_regenerate,
-    env_clean_temp,
-    env_create,
-    env_delete,
-    env_check,
-    env_lockfile_check,
-    env_install,
-    env_lock,
-)
-from .conda_config import condarc_create, condaops_config_manage, check_condarc_matches_opinions
-from .utils import logger
+import conda.plugins
 
 
 def conda_ops(argv: list):
     argv = list(argv)
-    parent_parser = argparse.ArgumentParser(add_help=False)
-    parent_parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR"], default="INFO", help="Set the log level")
 
-    parser = argparse.ArgumentParser("conda ops", parents=[parent_parser])
-    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    # only build the subparser that is needed unless we need all of them for the help or usage message
+    command = get_subcommand(argv)
+    if command in SUBCOMMANDS:
+        parser = get_parser((command,))
+    elif command is not None or "-h" in argv or "--help" in argv:
+        parser = get_parser(tuple(SUBCOMMANDS))
+    else:
+        parser = get_parser()
 
-    init = configure_parser_init(subparsers, parents=[parent_parser])
+    args = parser.parse_args(argv)
 
-    add = configure_parser_add(subparsers, parents=[parent_parser])
-    remove = configure_parser_remove(subparsers, parents=[parent_parser])
-    sync_parser = configure_parser_sync(subparsers, parents=[parent_parser])
-    install = configure_parser_install(subparsers, parents=[parent_parser])
-    uninstall = configure_parser_uninstall(subparsers, parents=[parent_parser])
-    config_parser = configure_parser_config(subparsers, parents=[parent_parser])
-    status = subparsers.add_parser("status", help="Report on the status of the conda-ops project")
+    # the command modules are imported here and in the handlers rather than at the top of the module
+    # since conda imports this module to discover the plugin on every conda invocation
+    from .commands_proj import proj_load
+    from .utils import logger
 
-    activate = subparsers.add_parser("activate", add_help=False)
-    activate.add_argument("kind", nargs=argparse.REMAINDER)
-    deactivate = subparsers.add_parser("deactivate", add_help=False)
+    logger.setLevel(args.log_level)
 
-    reqs = configure_parser_reqs(subparsers, parents=[parent_parser])
-    lockfile = subparsers.add_parser("lockfile", help="Additional operations for managing the lockfile. Accepts generate, check, reqs-check.", parents=[parent_parser])
-    lockfile.add_argument("kind", choices=["generate", "check", "reqs-check"])
-    env = subparsers.add_parser("env", help="Additional operations for managing the environment. Accepts create, install, delete, regenerate, check, lockfile-check.", parents=[parent_parser])
-    env.add_argument("kind", choices=["create", "delete", "activate", "deactivate", "check", "lockfile-check", "regenerate", "install", "clean"])
-    env.add_argument("-n", "--name", dest="env_name", nargs=1, type=str)
+    if args.command not in ["init"]:
+        config = proj_load(die_on_error=True)
+    else:
+        config = None
 
-    # hidden parser for testing purposes
-    subparsers.add_parser("test")
+    handler = HANDLERS.get(args.command, None)
+    if handler is None:
+        logger.error(f"Unhandled conda ops subcommand: '{args.command}'")
+    else:
+        handler(argv, args, config)
 
-    args = parser.parse_args(argv)
 
-    logger.setLevel(args.log_level)
+# #############################################################################################
+#
+# subcommand handlers
+#
+# #############################################################################################
 
-    if args.command not in ["init"]:
-        config = proj_load(die_on_error=True)
 
-    if args.command in ["status", None]:
-        consistency_check(config=config)
-    elif args.command == "config":
-        if args.create:
-            condarc_create(config=config)
-        else:
-            condaops_config_manage(argv, args, config=config)
-    elif args.command == "init":
-        config, overwrite = proj_create(prefix=args.relative_prefix)
-        condarc_create(config=config, overwrite=overwrite)
-        reqs_create(config=config)
-    elif args.command == "add":
-        packages = args.packages + args.other_packages
-        reqs_add(packages, config=config)
-        logger.info("To update the lockfile and environment with the additional packages:")
-        logger.info(">>> conda ops sync")
-    elif args.command == "remove":
-        reqs_remove(args.packages, config=config)
-        logger.info("To update the lockfile and environment with the removal of packages:")
-        logger.info(">>> conda ops sync")
-    elif args.command == "install":
-        packages = args.packages + args.other_packages
-        reqs_add(packages, config=config)
-        sync_complete = sync(config, force=args.force)
-        if sync_complete:
-            logger.info("Packages installed.")
-    elif args.command == "uninstall":
-        reqs_remove(args.packages, config=config)
-        sync_complete = sync(config, force=True)
-        if sync_complete:
-            logger.info("Packages uninstalled.")
-    elif args.command == "sync":
-        sync_complete = sync(config, force=args.force)
-        if sync_complete:
-            logger.info("Sync complete")
-    elif args.command == "activate":
+def cmd_status(argv, args, config):
+    from .commands import consistency_check
+
+    consistency_check(config=config)
+
+
+def cmd_config(argv, args, config):
+    from .conda_config import condarc_create, condaops_config_manage
+
+    if args.create:
+        condarc_create(config=config)
+    else:
+        condaops_config_manage(argv, args, config=config)
+
+
+def cmd_init(argv, args, config):
+    from .commands_proj import proj_create
+    from .commands_reqs import reqs_create
+    from .conda_config import condarc_create
+
+    config, overwrite = proj_create(prefix=args.relative_prefix)
+    condarc_create(config=config, overwrite=overwrite)
+    reqs_create(config=config)
+
+
+def cmd_add(argv, args, config):
+    from .commands_reqs import reqs_add
+    from .utils import logger
+
+    packages = args.packages + args.other_packages
+    reqs_add(packages, config=config)
+    logger.info("To update the lockfile and environment with the additional packages:")
+    logger.info(">>> conda ops sync")
+
+
+def cmd_remove(argv, args, config):
+    from .commands_reqs import reqs_remove
+    from .utils import logger
+
+    reqs_remove(args.packages, config=config)
+    logger.info("To update the lockfile and environment with the removal of packages:")
+    logger.info(">>> conda ops sync")
+
+
+def cmd_install(argv, args, config):
+    from .commands import sync
+    from .commands_reqs import reqs_add
+    from .utils import logger
+
+    packages = args.packages + args.other_packages
+    reqs_add(packages, config=config)
+    sync_complete = sync(config, force=args.force)
+    if sync_complete:
+        logger.info("Packages installed.")
+
+
+def cmd_uninstall(argv, args, config):
+    from .commands import sync
+    from .commands_reqs import reqs_remove
+    from .utils import logger
+
+    reqs_remove(args.packages, config=config)
+    sync_complete = sync(config, force=True)
+    if sync_complete:
+        logger.info("Packages uninstalled.")
+
+
+def cmd_sync(argv, args, config):
+    from .commands import sync
+    from .utils import logger
+
+    sync_complete = sync(config, force=args.force)
+    if sync_complete:
+        logger.info("Sync complete")
+
+
+def cmd_activate(argv, args, config):
+    from .commands_env import env_activate
+
+    env_activate(config=config)
+
+
+def cmd_deactivate(argv, args, config):
+    from .commands_env import env_deactivate
+
+    env_deactivate(config)
+
+
+def cmd_lockfile(argv, args, config):
+    from .commands import lockfile_generate
+    from .commands_lockfile import lockfile_check, lockfile_reqs_check
+    from .utils import logger
+
+    if args.kind == "generate":
+        lockfile_generate(config, regenerate=True)
+    elif args.kind == "check":
+        check, _ = lockfile_check(config)
+        if check:
+            logger.info("Lockfile is consistent")
+    elif args.kind == "reqs-check":
+        check = lockfile_reqs_check(config)
+        if check:
+            logger.info("Lockfile and requirements are consistent")
+
+
+def cmd_env(argv, args, config):
+    from .commands_env import (
+        env_activate,
+        env_deactivate,
+        env_regenerate,
+        env_clean_temp,
+        env_create,
+        env_delete,
+        env_check,
+        env_lockfile_check,
+        env_install,
+    )
+    from .utils import logger
+
+    if args.kind == "create":
+        env_create(config=config)
+    elif args.kind == "regenerate":
+        env_regenerate(config=config)
+    elif args.kind == "install":
+        env_install(config=config)
+    elif args.kind == "delete":
+        success = env_delete(config=config)
+        if success:
+            logger.info("Conda ops environment deleted.")
+    elif args.kind == "activate":
         env_activate(config=config)
-    elif args.command == "deactivate":
+    elif args.kind == "deactivate":
         env_deactivate(config)
-    elif args.command == "lockfile":
-        if args.kind == "generate":
-            lockfile_generate(config, regenerate=True)
-        elif args.kind == "check":
-            check, _ = lockfile_check(config)
-            if check:
-                logger.info("Lockfile is consistent")
-        elif args.kind == "reqs-check":
-            check = lockfile_reqs_check(config)
-            if check:
-                logger.info("Lockfile and requirements are consistent")
-    elif args.command == "env":
-        if args.kind == "create":
-            env_create(config=config)
-        if args.kind == "regenerate":
-            env_regenerate(config=config)
-        elif args.kind == "install":
-            env_install(config=config)
-        elif args.kind == "delete":
-            success = env_delete(config=config)
-            if success:
-                logger.info("Conda ops environment deleted.")
-        elif args.kind == "activate":
-            env_activate(config=config)
-        elif args.kind == "deactivate":
-            env_deactivate(config)
-        elif args.kind == "check":
-            env_check(config=config)
-        elif args.kind == "lockfile-check":
-            env_lockfile_check(config=config)
-        elif args.kind == "clean":
-            if args.env_name is not None:
-                env_clean_temp(env_base_name=args.env_name[0])
-            else:
-                env_clean_temp(config=config)
-    elif args.command == "test":
-        check_condarc_matches_opinions(config=config)
-    elif args.reqs_command == "create":
+    elif args.kind == "check":
+        env_check(config=config)
+    elif args.kind == "lockfile-check":
+        env_lockfile_check(config=config)
+    elif args.kind == "clean":
+        if args.env_name is not None:
+            env_clean_temp(env_base_name=args.env_name[0], yes=args.yes)
+        else:
+            env_clean_temp(config=config, yes=args.yes)
+
+
+def cmd_test(argv, args, config):
+    from .conda_config import check_condarc_matches_opinions
+
+    check_condarc_matches_opinions(config=config)
+
+
+def cmd_reqs(argv, args, config):
+    from .commands_reqs import reqs_create, reqs_add, reqs_remove, reqs_check, reqs_list, reqs_edit
+    from .utils import logger
+
+    if args.reqs_command == "create":
         reqs_create(config)
     elif args.reqs_command == "add":
-        reqs_add(args.packages, config=config)
+        packages = args.packages + args.other_packages
+        reqs_add(packages, config=config)
         logger.info("To update the lock file:")
         logger.info(">>> conda ops sync")
     elif args.reqs_command == "remove":
@@ -155,7 +218,27 @@ def conda_ops(argv: list):
     elif args.reqs_command == "edit":
         reqs_edit(config)
     else:
-        logger.error(f"Unhandled conda ops subcommand: '{args.command}'")
+        logger.error(f"Unhandled conda ops subcommand: 'reqs {args.reqs_command}'")
+
+
+# subcommand name -> function that runs it
+HANDLERS = {
+    None: cmd_status,
+    "status": cmd_status,
+    "config": cmd_config,
+    "init": cmd_init,
+    "add": cmd_add,
+    "remove": cmd_remove,
+    "install": cmd_install,
+    "uninstall": cmd_uninstall,
+    "sync": cmd_sync,
+    "activate": cmd_activate,
+    "deactivate": cmd_deactivate,
+    "lockfile": cmd_lockfile,
+    "env": cmd_env,
+    "test": cmd_test,
+    "reqs": cmd_reqs,
+}
 
 
 # #############################################################################################
@@ -184,7 +267,7 @@ class ParseChannels(argparse.Action):
         return
 
     def __call__(self, parser, namespace, values, option_string=None):
-        return_values = getattr(namespace, self.dest)
+        return_values = list(getattr(namespace, self.dest) or [])
         channel_name = values[0]
 
         n = 1
@@ -222,13 +305,13 @@ class ParsePip(argparse.Action):
 
     def __call__(self, parser, namespace, values, option_string=None):
         channel_name = "pip"
-        return_values = getattr(namespace, self.dest)
+        return_values = list(getattr(namespace, self.dest) or [])
         if len(values) > 0:
             for i, package in enumerate(values):
                 # check if the channel is specified directly
                 # as :: breaks the --pip pattern
                 if "::" in package:
-                    return_values += values[i + n :]
+                    return_values += values[i:]
                     break
                 elif "-e" in option_string:
                     return_values.append(f"-e {channel_name}::{package}")
@@ -244,107 +327,125 @@ class ParsePip(argparse.Action):
 # #############################################################################################
 
 
-def configure_parser_add(subparsers, parents):
-    descr = "Add packages to the requirements file."
-    p = subparsers.add_parser("add", description=descr, help=descr, parents=parents)
+# help text shared by the subcommands (and the reqs subcommands) that accept the same options
+SUBCOMMAND_HELP = {
+    "add": "Add packages to the requirements file.",
+    "init": "Create a conda ops project in the current directory and create a requirements file if it doesn't exist.",
+    "install": "Add packages to the requirements file and sync the environment and lockfile.",
+    "remove": "Remove packages from the requirements file. Removes all versions of the packages from any channel they are found in.",
+    "sync": "Sync the environment and lock file with the requirements file.",
+    "uninstall": "Remove packages from the requirements file and sync the environment and lockfile. Removes all versions of the packages from any channel they are found in.",
+    "status": "Report on the status of the conda-ops project",
+    "lockfile": "Additional operations for managing the lockfile. Accepts generate, check, reqs-check.",
+    "env": "Additional operations for managing the environment. Accepts create, install, delete, regenerate, check, lockfile-check.",
+    "reqs": "Additional operations for managing the requirements file. Accepts arguments create, add, remove, check, list, edit.",
+}
+
+ARGUMENT_HELP = {
+    "channel": "Indicates the channel that the added packages that follow are coming from, that is, `-c c1 p1 p2` indicates that packages p1 and p2 come from channel c1",
+    "pip": "Indicates that the packages following it are from pip, that is, `--pip p1 p2` indicates that the packages p1 and p2 should be added to the pip section",
+    "editable": "Indicates that the package that follows should be installed via pip with the editable option, that is `-e p1` means that the package p1 should be installed by pip in editable mode",
+    "force": "Force the lock file and environment to be recreated.",
+}
+
+
+def add_subcommand_parser(subparsers, name, parents, **kwargs):
+    """
+    Add the parser for the subcommand name, using its entry in SUBCOMMAND_HELP as the description and help.
+    """
+    descr = SUBCOMMAND_HELP[name]
+    return subparsers.add_parser(name, description=descr, help=descr, parents=parents, **kwargs)
+
+
+def add_package_arguments(p):
+    """
+    Add the package arguments shared by the subcommands that add packages to the requirements file.
+    """
     p.add_argument("packages", type=str, nargs="*", default=[], action="extend")
-    p.add_argument(
-        "-c",
-        "--channel",
-        nargs="+",
-        dest="other_packages",
-        default=[],
-        action=ParseChannels,
-        help="Indicates the channel that the added packages that follow are coming from, that is, `-c c1 p1 p2` indicates that packages p1 and p2 come from channel c1",
-    )
-    p.add_argument(
-        "--pip",
-        nargs="+",
-        default=[],
-        dest="other_packages",
-        action=ParsePip,
-        help="Indicates that the packages following it are from pip, that is, `--pip p1 p2` indicates that the pacakges p1 and p2 should be added to the pip section",
-    )
-    p.add_argument(
-        "-e",
-        nargs=1,
-        default=[],
-        dest="other_packages",
-        action=ParsePip,
-        help="Indicates that the package that follows should be installed via pip with the editable option, that is `-e p1` means that the package p1 should be installed by pip in editable mode",
-    )
+    p.add_argument("-c", "--channel", nargs="+", dest="other_packages", default=[], action=ParseChannels, help=ARGUMENT_HELP["channel"])
+    p.add_argument("--pip", nargs="+", dest="other_packages", default=[], action=ParsePip, help=ARGUMENT_HELP["pip"])
+    p.add_argument("-e", nargs=1, dest="other_packages", default=[], action=ParsePip, help=ARGUMENT_HELP["editable"])
+
+
+def configure_parser_add(subparsers, parents):
+    p = add_subcommand_parser(subparsers, "add", parents)
+    add_package_arguments(p)
     return p
 
 
 def configure_parser_init(subparsers, parents):
-    descr = "Create a conda ops project in the current directory and create a requirements file if it doesn't exist."
-    p = subparsers.add_parser("init", description=descr, help=descr, parents=parents)
+    p = add_subcommand_parser(subparsers, "init", parents)
     p.add_argument("-p", "--prefix", action="store", help="Path to environment location (i.e. prefix) relative to the .conda-ops/envs directory.", dest="relative_prefix", default="")
     return p
 
 
 def configure_parser_install(subparsers, parents):
-    descr = "Add packages to the requirements file and sync the environment and lockfile."
-    p = subparsers.add_parser("install", description=descr, help=descr, parents=parents)
-    p.add_argument("packages", type=str, nargs="*", default=[], action="extend")
-    p.add_argument(
-        "-c",
-        "--channel",
-        nargs="+",
-        dest="other_packages",
-        default=[],
-        action=ParseChannels,
-        help="Indicates the channel that the added packages that follow are coming from, that is, `-c c1 p1 p2` indicates that pacakges p1 and p2 come from channel c1",
-    )
-    p.add_argument(
-        "--pip",
-        nargs="+",
-        default=[],
-        action=ParsePip,
-        dest="other_packages",
-        help="Indicates that the packages following it are from pip, that is, `--pip p1 p2` indicates that the pacakges p1 and p2 should be added to the pip section",
-    )
-    p.add_argument(
-        "-e",
-        nargs=1,
-        default=[],
-        action=ParsePip,
-        dest="other_packages",
-        help="Indicates that the package that follows should be installed via pip with the editable option, that is `-e p1` means that the package p1 should be installed by pip in editable mode",
-    )
-    p.add_argument("-f", "--force", action="store_true", help="Force the lock file and environment to be recreated.")
+    p = add_subcommand_parser(subparsers, "install", parents)
+    add_package_arguments(p)
+    p.add_argument("-f", "--force", action="store_true", help=ARGUMENT_HELP["force"])
     return p
 
 
 def configure_parser_remove(subparsers, parents):
-    descr = "Remove packages from the requirements file. Removes all versions of the packages from any channel they are found in."
-    p = subparsers.add_parser("remove", description=descr, help=descr, parents=parents)
+    p = add_subcommand_parser(subparsers, "remove", parents)
     p.add_argument("packages", type=str, nargs="+")
     return p
 
 
 def configure_parser_sync(subparsers, parents):
-    descr = "Sync the environment and lock file with the requirements file."
-    p = subparsers.add_parser("sync", description=descr, help=descr, parents=parents)
-    p.add_argument("-f", "--force", action="store_true", help="Force the lock file and environment to be recreated.")
+    p = add_subcommand_parser(subparsers, "sync", parents)
+    p.add_argument("-f", "--force", action="store_true", help=ARGUMENT_HELP["force"])
     return p
 
 
 def configure_parser_uninstall(subparsers, parents):
-    descr = "Remove packages from the requirements file and sync the environment and lockfile. Removes all versions of the packages from any channel they are found in."
-    p = subparsers.add_parser("uninstall", description=descr, help=descr, parents=parents)
+    p = add_subcommand_parser(subparsers, "uninstall", parents)
     p.add_argument("packages", type=str, nargs="+")
     return p
 
 
+def configure_parser_status(subparsers, parents):
+    p = add_subcommand_parser(subparsers, "status", parents)
+    return p
+
+
+def configure_parser_activate(subparsers, parents):
+    p = subparsers.add_parser("activate", add_help=False)
+    p.add_argument("kind", nargs=argparse.REMAINDER)
+    return p
+
+
+def configure_parser_deactivate(subparsers, parents):
+    p = subparsers.add_parser("deactivate", add_help=False)
+    return p
+
+
+def configure_parser_lockfile(subparsers, parents):
+    p = add_subcommand_parser(subparsers, "lockfile", parents)
+    p.add_argument("kind", choices=["generate", "check", "reqs-check"])
+    return p
+
+
+def configure_parser_env(subparsers, parents):
+    p = add_subcommand_parser(subparsers, "env", parents)
+    p.add_argument("kind", choices=["create", "delete", "activate", "deactivate", "check", "lockfile-check", "regenerate", "install", "clean"])
+    p.add_argument("-n", "--name", dest="env_name", nargs=1, type=str)
+    p.add_argument("-y", "--yes", action="store_true", help="Clean up temporary environments without asking for confirmation.")
+    return p
+
+
+def configure_parser_test(subparsers, parents):
+    # hidden parser for testing purposes
+    p = subparsers.add_parser("test")
+    return p
+
+
 def configure_parser_reqs(subparsers, parents):
-    descr = "Additional operations for managing the requirements file. Accepts arguments create, add, remove, check, list, edit."
-    p = subparsers.add_parser("reqs", help=descr, parents=parents)
-    reqs_subparser = p.add_subparsers(dest="reqs_command", metavar="reqs_command")
+    p = add_subcommand_parser(subparsers, "reqs", parents)
+    reqs_subparser = p.add_subparsers(dest="reqs_command", metavar="reqs_command", required=False)
     reqs_subparser.add_parser("create")
-    r_add = configure_parser_add(reqs_subparser, parents)
-    r_remove = reqs_subparser.add_parser("remove")
-    r_remove.add_argument("packages", type=str, nargs="+")
+    configure_parser_add(reqs_subparser, parents)
+    configure_parser_remove(reqs_subparser, parents)
     reqs_subparser.add_parser("check")
     reqs_subparser.add_parser("list")
     reqs_subparser.add_parser("edit")
@@ -426,6 +527,57 @@ def configure_parser_config(subparsers, parents):
     return p
 
 
+# subcommand name -> function that adds its subparser, in the order they appear in the help message
+SUBCOMMANDS = {
+    "init": configure_parser_init,
+    "add": configure_parser_add,
+    "remove": configure_parser_remove,
+    "sync": configure_parser_sync,
+    "install": configure_parser_install,
+    "uninstall": configure_parser_uninstall,
+    "config": configure_parser_config,
+    "status": configure_parser_status,
+    "activate": configure_parser_activate,
+    "deactivate": configure_parser_deactivate,
+    "reqs": configure_parser_reqs,
+    "lockfile": configure_parser_lockfile,
+    "env": configure_parser_env,
+    "test": configure_parser_test,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_parser(commands=()):
+    """
+    Build the conda ops parser with subparsers for the given commands.
+
+    The result is memoized so repeated calls to conda_ops reuse the same parser.
+    """
+    parent_parser = argparse.ArgumentParser(add_help=False)
+    parent_parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR"], default="INFO", help="Set the log level")
+
+    parser = argparse.ArgumentParser("conda ops", parents=[parent_parser])
+    subparsers = parser.add_subparsers(dest="command", metavar="command", required=False)
+    for command in commands:
+        SUBCOMMANDS[command](subparsers, parents=[parent_parser])
+    return parser
+
+
+def get_subcommand(argv):
+    """
+    Return the first positional argument in argv, i.e. the requested subcommand, or None if there isn't one.
+    """
+    skip_next = False
+    for arg in argv:
+        if skip_next:
+            skip_next = False
+        elif arg == "--log-level":
+            skip_next = True
+        elif not arg.startswith("-"):
+            return arg
+    return None
+
+
 @conda.plugins.hookimpl
 def conda_subcommands():
     yield conda.plugins.CondaSubcommand(
@@ -1,10 +1,19 @@
 from contextlib import AbstractContextManager
-import json
+import copy
+import logging
 import os
 from pathlib import Path
+import sys
+import traceback
 
 
+from conda.core.envs_manager import get_user_environments_txt_file
+
 from .python_api import run_command
+from .utils import logger, json_loads
+
+# (cache key, conda info) for get_conda_info
+_CONDA_INFO_CACHE = {}
 
 
 class CondaOpsManagedCondarc(AbstractContextManager):
@@ -40,8 +49,9 @@ class CondaOpsManagedCondarc(AbstractContextManager):
             del os.environ["CONDARC"]
         if exc_type is SystemExit:
             logger.error("System Exiting...")
-            logger.debug(f"exc_value: {exc_value} \n")
-            logger.debug(f"exc_traceback: {traceback.print_tb(exc_traceback)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"exc_value: {exc_value} \n")
+                logger.debug(f"exc_traceback: {''.join(traceback.format_tb(exc_traceback))}")
 
 
 class EnvObject(object):
@@ -115,14 +125,47 @@ def get_conda_info():
 
     XXX Should this maybe look into the conda internals instead?
     XXX previous get_info_dict did this, but the internal call does not contain the envs
+
+    The result is cached, and reused until an environment is created or removed (or CONDARC changes).
+
+    Returns a copy of the information so the caller is free to modify it.
+    """
+    cached = _CONDA_INFO_CACHE.get("info", None)
+    if cached is None or cached[0] != conda_info_cache_key(cached[1]):
+        # Note: we do not want or need to use the condarc context handler here.
+        stdout, stderr, result_code = run_command("info", "--json", use_exception_handler=False)
+        if result_code != 0:
+            logger.info(stdout)
+            logger.info(stderr)
+            sys.exit(result_code)
+        conda_info = json_loads(stdout)
+        cached = (conda_info_cache_key(conda_info), conda_info)
+        _CONDA_INFO_CACHE["info"] = cached
+    return copy.deepcopy(cached[1])
+
+
+def conda_info_cache_key(conda_info):
     """
-    # Note: we do not want or need to use the condarc context handler here.
-    stdout, stderr, result_code = run_command("info", "--json", use_exception_handler=False)
-    if result_code != 0:
-        logger.info(stdout)
-        logger.info(stderr)
-        sys.exit(result_code)
-    return json.loads(stdout)
+    Compute the key that determines if cached conda info is still valid.
+
+    Creating or removing an environment changes the modification time of the user environments.txt file or of
+    one of the envs directories, so those are used to detect changes to the list of environments.
+    """
+    paths = [Path(get_user_environments_txt_file())] + [Path(x) for x in conda_info.get("envs_dirs", [])]
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(path.stat().st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return (os.environ.get("CONDARC"), tuple(mtimes))
+
+
+def clear_conda_info_cache():
+    """
+    Drop the cached conda info.
+    """
+    _CONDA_INFO_CACHE.pop("info", None)
 
 
 def get_prefix(env_name):
@@ -141,18 +184,26 @@ def get_prefix(env_name):
     return str(prefix / env_name)
 
 
-def check_env_exists(env_name=None, prefix=None):
+def get_existing_envs():
     """
-    Given the name of a conda environment, check if it exists
+    Return the set of prefixes (as Paths) of all existing conda environments.
+
+    Use this instead of repeated calls to check_env_exists when checking many environments.
     """
     json_output = get_conda_info()
+    return frozenset(Path(x) for x in json_output["envs"])
+
 
-    env_list = [Path(x) for x in json_output["envs"]]
+def check_env_exists(env_name=None, prefix=None):
+    """
+    Given the name of a conda environment, check if it exists
+    """
     if prefix is None:
         prefix = Path(get_prefix(env_name))
     else:
         prefix = Path(prefix)
-    return prefix in env_list
+    # stop at the first match rather than building the full set of existing prefixes
+    return any(Path(x) == prefix for x in get_conda_info()["envs"])
 
 
 def check_env_active(env_name):
@@ -82,6 +82,8 @@ class KVStore(MutableMapping):
             self._config_file = pathlib.Path(config_file)
         self._config_section = config_section
         self._config = configparser.ConfigParser(interpolation=configparser.ExtendedInterpolation())
+        # (mtime_ns, size) of the config file when it was last read or written, to skip rereading it unchanged
+        self._config_stamp = None
 
         self.data = dict()
 
@@ -114,8 +116,20 @@ class KVStore(MutableMapping):
     def __len__(self):
         return len(self.data)
 
+    def _file_stamp(self):
+        try:
+            stat = self._config_file.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
     def _read(self):
+        stamp = self._file_stamp()
+        if stamp is not None and stamp == self._config_stamp:
+            # the file hasn't changed since we last read or wrote it
+            return
         self._config.read(self._config_file)
+        self._config_stamp = stamp
         if not self._config.has_section(self._config_section):
             # File exists but we are adding to a new section of it
             self._config.add_section(self._config_section)
@@ -124,6 +138,7 @@ class KVStore(MutableMapping):
         if self._persistent:
             with open(self._config_file, "w") as fw:
                 self._config.write(fw)
+            self._config_stamp = self._file_stamp()
 
     def __repr__(self):
         kvstr = ", ".join([f"{k}='{v}'" for k, v in self.data.items()])
@@ -1,16 +1,19 @@
-import json
+import copy
+import functools
 import re
 import sys
-import urllib
+import urllib.parse
 
-from packaging.requirements import Requirement
 from conda.common.pkg_formats.python import pypi_name_to_conda_name, norm_package_name
 from conda.models.match_spec import MatchSpec
 
-from .utils import logger, is_url_requirement
+from .utils import logger, is_url_requirement, json_loads
 from .commands_proj import proj_load
 from .kvstore import KVStore
 
+# a spec of the form "package=version"
+SINGLE_EQUALS_SPEC = re.compile(r"^\s*([\w.-]+)\s*=\s*([\w.-]+)\s*$")
+
 
 class PackageSpec:
     def __init__(self, spec, manager=None, channel=None):
@@ -49,7 +52,7 @@ class PackageSpec:
                 logger.error(f"Spec {clean_spec} seems to be editable")
                 logger.error("Editable modules must use the pip channel")
                 logger.info("To use pip with reqs add, use '--pip'")
-            requirement = MatchSpec(clean_spec)
+            requirement = parse_conda_spec(clean_spec)
 
         elif manager == "pip":
             if "-e " in clean_spec:
@@ -60,15 +63,14 @@ class PackageSpec:
             # look for "=" and not "==" in spec
             # "=" is a valid specifier in conda that doesn't mean ==
             # but pip only accepts ==
-            pattern = r"^\s*([\w.-]+)\s*=\s*([\w.-]+)\s*$"
-            match = re.match(pattern, clean_spec)
+            match = SINGLE_EQUALS_SPEC.match(clean_spec)
             if match:
                 # Change = to ==
                 clean_spec = clean_spec.replace("=", "==").strip()
             if is_url_requirement(clean_spec):
                 requirement = PathSpec(clean_spec)
             else:
-                requirement = Requirement(clean_spec)
+                requirement = parse_pip_spec(clean_spec)
         return requirement, editable
 
     @classmethod
@@ -235,11 +237,20 @@ class LockSpec:
         return cls(info_dict)
 
     @classmethod
-    def from_lock_entry(cls, lock_dict, config=None, lookup_file=None):
+    def from_lock_entry(cls, lock_dict, config=None, lookup_file=None, url_lookup=None):
+        """
+        Create a LockSpec from a lock file entry, replacing local:// urls using the url lookup.
+
+        Pass an already loaded url_lookup when creating many LockSpecs to avoid reloading it for each one.
+        """
         lock_url = lock_dict.get("url", None)
+        # only local urls need any further processing
+        if lock_url is None or not lock_url.startswith("local://"):
+            return cls(lock_dict)
         url = urllib.parse.urlparse(lock_url)
         if url.scheme == "local":
-            url_lookup = load_url_lookup(config=config, lookup_file=lookup_file)
+            if url_lookup is None:
+                url_lookup = load_url_lookup(config=config, lookup_file=lookup_file)
             try:
                 lock_dict["url"] = url_lookup.get(url.netloc)
             except Exception:
@@ -255,9 +266,9 @@ class LockSpec:
         if (self.manager != "conda") or (self.name not in explicit_string):
             logger.error(f"The explicit string {explicit_string} does not match the LockSpec {self}")
             sys.exit(1)
-        md5_split = explicit_string.split("#")
-        self.info_dict["hash"] = {"md5": md5_split[-1]}
-        self.info_dict["url"] = md5_split[0]
+        url, _, md5 = explicit_string.rpartition("#")
+        self.info_dict["hash"] = {"md5": md5}
+        self.info_dict["url"] = url
 
     def check_consistency(self):
         check = True
@@ -409,12 +420,15 @@ def get_pypi_package_info(package_name, version, filename):
 
     If installed, use the matching distribution and platform information from what is installed.
     """
+    # only needed here, so don't pay for importing it with the rest of the module
+    import urllib.request
+
     url = f"https://pypi.org/pypi/{package_name}/{version}/json"
 
     # Fetch the package metadata JSON
     try:
         with urllib.request.urlopen(url) as response:
-            data = json.loads(response.read().decode())
+            data = json_loads(response.read())
             releases = data["urls"]
     except Exception as exception:
         # try another url pattern if needed "https://pypi.org/pypi/{package_name}/json"
@@ -437,3 +451,39 @@ def get_pypi_package_info(package_name, version, filename):
         logger.debug(f"No wheel distribution found for {package_name} {version}.")
         return None, None
     return url, sha256_hash
+
+
+def parse_conda_spec(spec):
+    """
+    Parse a conda spec into a MatchSpec.
+
+    The same specs get parsed many times over a single command, so the parsing is cached. Each call returns
+    its own copy of the cached MatchSpec so that no caller can change it for the others.
+    """
+    return copy.copy(_parse_conda_spec(spec))
+
+
+def parse_pip_spec(spec):
+    """
+    Parse a PEP 508 spec into a Requirement.
+
+    The same specs get parsed many times over a single command, so the parsing is cached. Each call returns
+    its own copy of the cached Requirement so that no caller can change it for the others.
+    """
+    requirement = copy.copy(_parse_pip_spec(spec))
+    # extras is the only attribute that can be changed in place rather than just reassigned
+    requirement.extras = set(requirement.extras)
+    return requirement
+
+
+@functools.lru_cache(maxsize=8192)
+def _parse_conda_spec(spec):
+    return MatchSpec(spec)
+
+
+@functools.lru_cache(maxsize=8192)
+def _parse_pip_spec(spec):
+    # packaging.requirements is slow to import and conda doesn't otherwise need it, so import it on first use
+    from packaging.requirements import Requirement
+
+    return Requirement(spec)
@@ -1,9 +1,7 @@
-import json
-
 from collections import defaultdict
 from pathlib import Path
 
-from .utils import yaml
+from .utils import yaml_safe_load_file
 
 
 def env_split(conda_env, conda_channel_order):
@@ -17,32 +15,36 @@ def env_split(conda_env, conda_channel_order):
        dict containing the list of dependencies by channel name
 
         Python object corresponding to environment.yml"""
-    # Cheater way to make deep Copies
-    json_copy = json.dumps(conda_env)
-    conda_env = json.loads(json_copy)
-
-    deplist = conda_env.pop("dependencies")
+    # split the dependencies in a single pass without modifying the conda_env that was passed in
+    conda_env_dependencies = conda_env["dependencies"]
+    conda_env = {key: value for key, value in conda_env.items() if key not in ["dependencies", "channels"]}
+    known_channels = set(conda_channel_order)
     channel_dict = defaultdict(list)
+    defaults_list = []
 
-    for k, dep in enumerate(deplist[:]):  # Note: copy list, as we mutate it
+    for dep in conda_env_dependencies:
         if isinstance(dep, dict):  # nested yaml
             if dep.get("pip", None):
-                pip_dict = deplist.pop(k)
-                channel_dict["pip"] = pip_dict["pip"]
+                channel_dict["pip"] = list(dep["pip"])
+            else:
+                defaults_list.append(dep)
         else:
             prefix_check = dep.split("::")
             if len(prefix_check) > 1:
                 channel = prefix_check[0]
-                if channel not in conda_channel_order:
+                if channel not in known_channels:
                     raise Exception(
                         f"the channel {channel} required for {dep} is not specified in a channels \
                         section of the environment file"
                     )
-                channel_dict[f"{channel}"].append(prefix_check[1])
-                deplist.remove(dep)
+                if channel == "defaults":
+                    defaults_list.append(prefix_check[1])
+                else:
+                    channel_dict[f"{channel}"].append(prefix_check[1])
+            else:
+                defaults_list.append(dep)
 
-    channel_dict["defaults"] = deplist
-    conda_env.pop("channels")
+    channel_dict["defaults"] = defaults_list
     return conda_env, channel_dict
 
 
@@ -64,9 +66,11 @@ def create_split_files(file_to_split, base_path, split_pip=True):
     Given an environment.yml file to split, output the split files to the base_path.
 
     If split_pip, separate normal pypi packages from sdists and -e . packages.
+
+    Returns the channel order to install the split files in, including "pypi" and/or "sdist" when
+    split_pip is True and there are packages of that kind.
     """
-    with open(file_to_split, "r") as yamlfile:
-        conda_env = yaml.load(yamlfile)
+    conda_env = yaml_safe_load_file(file_to_split)
 
     base_path = Path(base_path)
 
@@ -104,5 +108,4 @@ def create_split_files(file_to_split, base_path, split_pip=True):
             with open(base_path / filename, "w") as file_handle:
                 file_handle.write("\n".join(channel_dict[kind]))
 
-    with open(base_path / ".ops.channel-order.include", "w") as file_handle:
-        file_handle.write(" ".join(channel_order))
+    return channel_order
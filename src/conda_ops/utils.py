@@ -1,14 +1,29 @@
+import copy
+import json
 import logging
+from operator import itemgetter
 import os
+from pathlib import Path
 import re
 
 from ruamel.yaml import YAML
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 yaml = YAML()
 yaml.default_flow_style = False
 yaml.width = 4096
 yaml.indent(offset=4)
 
+# for files that are only read, we don't need to keep the comments and formatting
+safe_yaml = YAML(typ="safe")
+
+# path -> ((mtime_ns, size), parsed contents) for yaml_safe_load_file
+_YAML_CACHE = {}
+
 
 logger = logging.getLogger()
 
@@ -22,6 +37,9 @@ sh = logging.StreamHandler()
 sh.setFormatter(logging.Formatter(" %(levelname)-8s (%(name)s) %(message)s"))
 logger.addHandler(sh)
 
+# a windows path starting with a drive letter, e.g. C:\
+WINDOWS_DRIVE_PATH = re.compile(r"^\w+:\\")
+
 CONDA_OPS_DIR_NAME = ".conda-ops"
 CONFIG_FILENAME = "config.ini"
 
@@ -33,7 +51,8 @@ def align_and_print_data(data, header=None):
     if header is None:
         header = data[0]
         data = data[1:]
-    sorted_data = sorted(data[:], key=lambda x: x[0])
+    # sorted already returns a new list, so there is no need to copy data first
+    sorted_data = sorted(data, key=itemgetter(0))
     # Define the column widths based on the maximum length in each column
     column_widths = [max(len(str(item)) for item in column) + 2 for column in zip(*([header] + sorted_data))]
 
@@ -43,7 +62,7 @@ def align_and_print_data(data, header=None):
     table_str += "=" * len(header_row) + "\n"
 
     # Print the data rows
-    for row in sorted_data[:]:
+    for row in sorted_data:
         formatted_line = " ".join(str(item).ljust(width) for item, width in zip(row, column_widths))
         table_str += formatted_line + "\n"
 
@@ -51,11 +70,79 @@ def align_and_print_data(data, header=None):
     return table_str
 
 
+def yaml_safe_load(stream):
+    """
+    Load YAML into plain python objects, dropping comments and formatting.
+
+    This is much faster than yaml.load, so use it whenever the result won't be written back out.
+    It uses ruamel.yaml's safe loader so scalars are parsed by the same YAML 1.2 rules as yaml.load.
+    """
+    return safe_yaml.load(stream)
+
+
+def yaml_safe_load_file(path):
+    """
+    Load the YAML file at path with yaml_safe_load, reusing the result of an earlier call if the file
+    has not been modified since (i.e. its mtime and size are unchanged).
+
+    Returns a copy of the contents so the caller is free to modify it.
+    """
+    path = Path(path)
+    stat = path.stat()
+    # include the size so that a rewrite within the filesystem's mtime resolution is still noticed
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _YAML_CACHE.get(path, None)
+    if cached is None or cached[0] != stamp:
+        # pass the raw bytes so that the loader does the utf-8 decoding itself
+        cached = (stamp, yaml_safe_load(path.read_bytes()))
+        _YAML_CACHE[path] = cached
+    return copy.deepcopy(cached[1])
+
+
+def clear_yaml_cache(path):
+    """
+    Drop any cached contents of the YAML file at path. Call this before writing to the file.
+    """
+    _YAML_CACHE.pop(Path(path), None)
+
+
+def json_load(fp):
+    """
+    Load JSON from the open file fp, using orjson when it is available.
+
+    fp may be opened in binary mode, which skips decoding the text in python.
+    """
+    if orjson is not None:
+        return orjson.loads(fp.read())
+    return json.load(fp)
+
+
+def json_loads(data):
+    """
+    Load JSON from the str or bytes data (e.g. the captured output of a subprocess), using orjson when it is
+    available.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dump(obj, fp):
+    """
+    Write obj as JSON (indented, with sorted keys) to the file fp opened in binary mode, using orjson when it is
+    available. Both ways write the same bytes, with non-ASCII characters as UTF-8 rather than escaped.
+    """
+    if orjson is not None:
+        fp.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+    else:
+        fp.write(json.dumps(obj, indent=2, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+
+
 def is_url_requirement(requirement):
     is_url = False
     if "-e " in requirement:
         is_url = True
-    if requirement.startswith(".") or requirement.startswith("~") or re.match(r"^\w+:\\", requirement) is not None or os.path.isabs(requirement) or "/" in requirement:
+    if requirement.startswith(".") or requirement.startswith("~") or WINDOWS_DRIVE_PATH.match(requirement) is not None or os.path.isabs(requirement) or "/" in requirement:
         is_url = True
     for protocol in ["+ssh:", "+file:", "+https:"]:
         if protocol in requirement:
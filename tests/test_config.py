@@ -4,8 +4,9 @@ import sys
 
 from conda.common.serialize import yaml_round_trip_load
 
-from conda_ops.conda_config import check_config_items_match, CONDAOPS_OPINIONS, condarc_create, WHITELIST_CHANNEL, WHITELIST_SOLVER, condaops_config_manage
+from conda_ops.conda_config import check_config_items_match, CONDAOPS_OPINIONS, condarc_create, WHITELIST_CHANNEL, WHITELIST_SOLVER, condaops_config_manage, env_pip_interop
 from conda_ops.utils import logger
+from conda_ops import conda_config
 
 
 def test_check_config_items_match():
@@ -236,3 +237,17 @@ def test_condaops_config_manage_remove(mocker, setup_config_files):
 
     # should remove the values from the list and not call run_command
     sys.exit.assert_not_called()
+
+
+def test_env_pip_interop_already_set(mocker, setup_config_files):
+    """
+    The generated .condarc already enables pip interop, so conda config should only be called to change it.
+    """
+    config = setup_config_files
+    mocker.spy(conda_config, "run_command")
+
+    assert env_pip_interop(config=config, flag=True)
+    conda_config.run_command.assert_not_called()
+
+    assert env_pip_interop(config=config, flag=False)
+    assert conda_config.run_command.call_count == 1
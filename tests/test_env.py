@@ -3,8 +3,10 @@ from packaging.requirements import Requirement
 import pytest
 
 from conda_ops.commands import lockfile_generate
-from conda_ops.commands_env import env_create, env_check, get_prefix, env_lockfile_check, env_regenerate, env_delete, env_lock, active_env_check
-from conda_ops.env_handler import check_env_exists
+from conda_ops import commands_env
+from conda_ops.commands_env import env_create, env_check, get_prefix, env_lockfile_check, env_regenerate, env_delete, env_lock, active_env_check, conda_list_json_process
+from conda_ops import env_handler
+from conda_ops.env_handler import check_env_exists, get_conda_info, clear_conda_info_cache
 from conda_ops.commands_reqs import reqs_add
 from conda_ops.python_api import run_command
 
@@ -43,6 +45,47 @@ def test_check_env_exists(shared_temp_dir):
     assert check_env_exists(env_name) is False
 
 
+def test_get_conda_info_cache(mocker):
+    """
+    Repeated calls to get_conda_info should only run conda info once until the cache is cleared.
+    """
+    clear_conda_info_cache()
+    run_command_spy = mocker.spy(env_handler, "run_command")
+    conda_info = get_conda_info()
+    assert get_conda_info() == conda_info
+    assert run_command_spy.call_count == 1
+
+    # the returned info is a copy
+    conda_info["platform"] = "not-a-platform"
+    assert get_conda_info()["platform"] != "not-a-platform"
+    assert run_command_spy.call_count == 1
+
+    clear_conda_info_cache()
+    get_conda_info()
+    assert run_command_spy.call_count == 2
+
+
+def test_conda_list_json_process_cleanup(mocker):
+    """
+    The conda list subprocess should be killed and reaped if the block exits before its output is collected,
+    and left alone once it has been.
+    """
+    process = mocker.Mock(returncode=None)
+    mocker.patch.object(commands_env.subprocess, "Popen", return_value=process)
+
+    with pytest.raises(SystemExit):
+        with conda_list_json_process("/not/a/prefix"):
+            raise SystemExit(1)
+    process.kill.assert_called_once()
+    process.communicate.assert_called_once()
+
+    process = mocker.Mock(returncode=0)
+    mocker.patch.object(commands_env.subprocess, "Popen", return_value=process)
+    with conda_list_json_process("/not/a/prefix") as conda_list_process:
+        assert conda_list_process is process
+    process.kill.assert_not_called()
+
+
 def test_env_create(mocker, setup_config_files):
     """
     Test the env_create function.
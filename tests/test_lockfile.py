@@ -1,6 +1,8 @@
+import io
 import pytest
 import json
-from conda_ops.commands import lockfile_generate
+from conda_ops import utils
+from conda_ops.commands import lockfile_generate, prune_lockfile_cache
 from conda_ops.commands_lockfile import lockfile_check, lockfile_reqs_check
 from conda_ops.commands_reqs import reqs_add
 from conda_ops.env_handler import get_conda_info
@@ -94,6 +96,39 @@ def test_lockfile_generate_new_platform(setup_config_files):
         assert in_lock_specs
 
 
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_json_dump_non_ascii(monkeypatch, use_orjson):
+    """
+    Lock file bytes should not depend on whether orjson is installed, including for non-ASCII fields.
+    """
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(utils, "orjson", None)
+    lock = [{"name": "café", "version": "1.0", "extras": []}]
+
+    stream = io.BytesIO()
+    utils.json_dump(lock, stream)
+
+    expected = '[\n  {\n    "extras": [],\n    "name": "café",\n    "version": "1.0"\n  }\n]'.encode("utf-8")
+    assert stream.getvalue() == expected
+    assert utils.json_loads(stream.getvalue()) == lock
+
+
+def test_prune_lockfile_cache(tmp_path):
+    """
+    Only the cached lock for the current inputs hash should survive pruning.
+    """
+    for inputs_hash in ["old", "current"]:
+        (tmp_path / inputs_hash).mkdir()
+        (tmp_path / inputs_hash / "lockfile.json").write_text("[]")
+
+    prune_lockfile_cache(tmp_path, keep="current")
+
+    assert [path.name for path in tmp_path.iterdir()] == ["current"]
+    assert (tmp_path / "current" / "lockfile.json").exists()
+
+
 def test_lockfile_check_when_file_exists_and_valid(setup_config_files):
     """
     Test case to verify the behavior of lockfile_check when the lockfile exists and is valid.
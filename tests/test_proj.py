@@ -3,7 +3,7 @@ import os
 
 import pytest
 
-from conda_ops.commands_proj import proj_create, proj_load, proj_check
+from conda_ops.commands_proj import proj_create, proj_load, proj_check, find_upwards
 from conda_ops.env_handler import CondaOpsManagedCondarc
 
 # Assuming these constants are defined in conda_ops
@@ -132,3 +132,13 @@ def test_lockfile_url_lookup_gitignore(mocker, setup_config_files, shared_temp_d
         if fnmatch.fnmatch(lockfile_url_lookup_path.name, line.strip()):
             check = True
     assert check
+
+
+def test_find_upwards(tmp_path):
+    nested = tmp_path / "a" / "b"
+    nested.mkdir(parents=True)
+    (tmp_path / "marker.txt").write_text("")
+
+    assert find_upwards(nested, "marker.txt") == tmp_path / "marker.txt"
+    assert find_upwards(nested, "a") == tmp_path / "a"
+    assert find_upwards(nested, "no-such-file-anywhere") is None
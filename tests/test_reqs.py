@@ -7,9 +7,9 @@ import sys
 
 import pytest
 
-from conda_ops.commands_reqs import reqs_add, reqs_remove, reqs_create, reqs_check, pop_pip_section, check_package_in_list, clean_package_args, open_file_in_editor
-from conda_ops.requirements import is_url_requirement
-from conda_ops.utils import yaml
+from conda_ops.commands_reqs import reqs_add, reqs_remove, reqs_create, reqs_check, pop_pip_section, check_package_in_list, index_package_list, package_index_key, clean_package_args, open_file_in_editor, check_for_duplicates
+from conda_ops.requirements import is_url_requirement, PackageSpec
+from conda_ops.utils import yaml, yaml_safe_load_file
 
 
 CONDA_OPS_DIR_NAME = ".conda-ops"
@@ -165,6 +165,41 @@ def test_check_package_in_list():
     assert matching_packages == ["numpy==1.18.3", "numpy>=1.18.0", "numpy<2.0.0"]
 
 
+def test_index_package_list():
+    """
+    Lookups in the index should give the same matches as check_package_in_list.
+    """
+    package_list = ["numpy", "requests", "conda-forge::numpy==1.18.5", "torch"]
+    index = index_package_list(package_list)
+    for package in ["numpy", "numpy==1.18.5", "pandas"]:
+        assert index.get(package_index_key(PackageSpec(package)), []) == check_package_in_list(package, package_list)
+
+    package_list = ["requests", "git+https://github.com/lmcinnes/pynndescent.git"]
+    index = index_package_list(package_list, channel="pip")
+    for package in ["requests>2", "git+https://github.com/lmcinnes/pynndescent.git"]:
+        spec = PackageSpec(package, channel="pip")
+        assert index.get(package_index_key(spec), []) == check_package_in_list(spec, package_list, channel="pip")
+
+
+def test_check_for_duplicates():
+    assert check_for_duplicates(["numpy", "pandas", "torch"]) == []
+    assert check_for_duplicates(["numpy", "pandas", "numpy", "torch", "pandas", "numpy"]) == ["numpy", "pandas"]
+
+
+def test_yaml_safe_load_file_cache(tmp_path):
+    """
+    A rewrite that keeps the same mtime but changes the size should not be served from the cache.
+    """
+    yaml_file = tmp_path / "environment.yml"
+    yaml_file.write_text("dependencies:\n- python\n")
+    stat = yaml_file.stat()
+    assert yaml_safe_load_file(yaml_file) == {"dependencies": ["python"]}
+
+    yaml_file.write_text("dependencies:\n- python\n- numpy\n")
+    os.utime(yaml_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert yaml_safe_load_file(yaml_file) == {"dependencies": ["python", "numpy"]}
+
+
 def test_reqs_add_equals_conda(setup_config_files):
     """
     Test the reqs_add function.
@@ -1,5 +1,5 @@
 import json
-from conda_ops.requirements import LockSpec, PackageSpec
+from conda_ops.requirements import LockSpec, PackageSpec, parse_conda_spec, parse_pip_spec
 from conda_ops.commands_env import env_delete
 
 
@@ -116,6 +116,15 @@ def test_to_explicit():
     ]
 
 
+def test_add_conda_explicit_info():
+    p = LockSpec.from_conda_list({"name": "ipython", "version": "8.12.0", "channel": "pkgs/main"}, platform="osx-64")
+    p.add_conda_explicit_info("https://repo.anaconda.com/pkgs/main/osx-64/ipython-8.12.0-py311hecd8cb5_0.conda#2cc7f4d64fba19f5be1a594c8cbad73e")
+
+    assert p.url == "https://repo.anaconda.com/pkgs/main/osx-64/ipython-8.12.0-py311hecd8cb5_0.conda"
+    assert p.md5_hash == "2cc7f4d64fba19f5be1a594c8cbad73e"
+    assert p.check_consistency()
+
+
 def test_packagespec_parsing():
     p = PackageSpec("git+https://github.com/lmcinnes/pynndescent.git", manager="pip")
     assert p.spec == "git+https://github.com/lmcinnes/pynndescent.git"
@@ -159,6 +168,28 @@ def test_packagespec_parsing():
     assert p.manager == "conda"
 
 
+def test_spec_parsing_is_cached():
+    """
+    Repeated specs should give equal results that don't share state.
+    """
+    p1 = PackageSpec("conda-forge::numpy>=1.20")
+    p2 = PackageSpec("conda-forge::numpy>=1.20")
+    assert p1.requirement == p2.requirement
+    assert p1.requirement is not p2.requirement
+    assert parse_conda_spec("conda-forge::numpy>=1.20") == p1.requirement
+    assert p1.name == "numpy"
+
+    p1 = PackageSpec("requests[socks]>=2.0", manager="pip")
+    p2 = PackageSpec("requests[socks]>=2.0", manager="pip")
+    assert p1.requirement == p2.requirement
+    assert p1.requirement is not p2.requirement
+    p1.requirement.extras.add("security")
+    p1.requirement.marker = None
+    p1.requirement.specifier = None
+    assert str(p2) == "requests[socks]>=2.0"
+    assert str(parse_pip_spec("requests[socks]>=2.0")) == "requests[socks]>=2.0"
+
+
 def test_lockfile_lookup_parsing(setup_config_files):
     config = setup_config_files
 